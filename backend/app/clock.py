@@ -0,0 +1,30 @@
+"""
+Clock
+=====
+
+This module provides a coarse, memoized wall-clock timestamp for hot paths
+that stamp every response.
+"""
+
+import time
+from datetime import datetime
+
+_last_now_check = 0.0
+_last_now_iso = ""
+
+def now_iso(max_age: float = 0.1) -> str:
+    """
+    Return the current time as an ISO string, reusing the last value while it is fresh.
+
+    Args:
+        max_age: Seconds a previously formatted timestamp may be reused
+
+    Returns:
+        ISO 8601 timestamp at most max_age seconds old
+    """
+    global _last_now_check, _last_now_iso
+    t = time.monotonic()
+    if t - _last_now_check > max_age:
+        _last_now_iso = datetime.now().isoformat()
+        _last_now_check = t
+    return _last_now_iso
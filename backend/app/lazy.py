@@ -0,0 +1,19 @@
+"""
+Lazy Imports
+============
+
+numpy and pandas dominate cold-start time, so the scrapers and services load
+them through these accessors on first use rather than at import.
+"""
+
+from types import ModuleType
+
+def load_numpy() -> ModuleType:
+    """Return the numpy module, importing it on first call"""
+    import numpy
+    return numpy
+
+def load_pandas() -> ModuleType:
+    """Return the pandas module, importing it on first call"""
+    import pandas
+    return pandas
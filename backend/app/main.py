@@ -5,16 +5,28 @@ Main FastAPI Application
 This module contains the main FastAPI application for the airline data insights platform.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Dict, Any, AsyncIterator, TYPE_CHECKING
+from contextlib import asynccontextmanager
 import logging
 from datetime import datetime
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 from dotenv import load_dotenv
 
+from config import settings
+from .clock import now_iso
+
+# The scrapers and the OpenAI service pull in the data stack (pandas, numpy, scipy,
+# networkx, cachetools), so they are imported on first use, not at startup
+if TYPE_CHECKING:
+    from .scrapers import FlightScraper
+    from .services import OpenAIService
+
 # Load environment variables
 load_dotenv()
 
@@ -22,26 +34,91 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Release the OpenAI client's pooled connections on shutdown"""
+    yield
+    if _openai_service is not None:
+        await _openai_service.aclose()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Airline Data Insights API",
     description="API for airline data scraping, processing, and insights generation",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Configure CORS: allowed origins are echoed back, since browsers reject "*" on credentialed requests
+_CORS_ORIGINS = frozenset(origin.encode() for origin in settings.CORS_ORIGINS)
+_CORS_ALLOW_ANY = b"*" in _CORS_ORIGINS
+_CORS_HEADERS = [
+    (b"access-control-allow-credentials", b"true"),
+    (b"vary", b"Origin"),
+]
+_CORS_PREFLIGHT_HEADERS = _CORS_HEADERS + [
+    (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    (b"access-control-max-age", b"600"),
+]
+
+class StaticCORSMiddleware:
+    """ASGI middleware applying the configured CORS policy from prebuilt headers"""
+    
+    __slots__ = ("app",)
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_headers = dict(scope["headers"])
+        origin = request_headers.get(b"origin")
+        if origin is None:
+            # Not a cross-origin request
+            await self.app(scope, receive, send)
+            return
+        allowed = _CORS_ALLOW_ANY or origin in _CORS_ORIGINS
+        
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in request_headers:
+            # Preflight: answer directly without entering the app
+            if not allowed:
+                await send({"type": "http.response.start", "status": 400,
+                            "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"vary", b"Origin")]})
+                await send({"type": "http.response.body", "body": b"Disallowed CORS origin"})
+                return
+            headers = [(b"access-control-allow-origin", origin)] + _CORS_PREFLIGHT_HEADERS
+            requested = request_headers.get(b"access-control-request-headers")
+            if requested:
+                headers.append((b"access-control-allow-headers", requested))
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+        
+        cors_headers = [(b"access-control-allow-origin", origin)] + _CORS_HEADERS
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + cors_headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+app.add_middleware(StaticCORSMiddleware)
 
 # Data models
 class FlightSearchRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     origin: Optional[str] = None
     destination: Optional[str] = None
     departure_date: Optional[str] = None
@@ -118,6 +195,100 @@ sample_flights = [
     }
 ]
 
+# Static insight payloads, serialized once at import time
+popular_routes = [
+    {"route": "JFK → LAX", "passengers": 15420, "avg_price": 299.99, "growth": 12.5},
+    {"route": "LAX → JFK", "passengers": 14890, "avg_price": 289.99, "growth": 8.3},
+    {"route": "ORD → LAX", "passengers": 13210, "avg_price": 279.99, "growth": 15.2},
+    {"route": "ATL → LAX", "passengers": 12850, "avg_price": 259.99, "growth": 6.8},
+    {"route": "JFK → SFO", "passengers": 11940, "avg_price": 319.99, "growth": 9.7}
+]
+
+trends = {
+    "price_trends": {
+        "overall_change": "+8.5%",
+        "domestic_change": "+5.2%",
+        "international_change": "+12.3%",
+        "trend_period": "last_30_days"
+    },
+    "demand_patterns": {
+        "peak_days": ["Friday", "Sunday"],
+        "peak_months": ["July", "December"],
+        "seasonal_factor": 1.15
+    },
+    "popular_destinations": [
+        {"destination": "LAX", "growth": 15.2},
+        {"destination": "JFK", "growth": 12.1},
+        {"destination": "ORD", "growth": 9.8},
+        {"destination": "ATL", "growth": 8.5}
+    ]
+}
+
+pricing_analysis = {
+    "current_avg_price": 289.99,
+    "price_change_24h": "+2.5%",
+    "price_change_7d": "+5.8%",
+    "price_change_30d": "+8.5%",
+    "price_prediction": {
+        "next_week": 295.50,
+        "next_month": 305.75,
+        "confidence": 0.85
+    },
+    "price_ranges": {
+        "budget": {"min": 199, "max": 249},
+        "standard": {"min": 250, "max": 399},
+        "premium": {"min": 400, "max": 699}
+    }
+}
+
+def _json_prefix(payload: Dict[str, Any]) -> bytes:
+    """Serialize a payload without its closing brace so a timestamp can be appended"""
+    return orjson.dumps(payload)[:-1]
+
+def _timestamped_response(prefix: bytes, key: bytes) -> Response:
+    """Complete a prebuilt JSON prefix with the current timestamp"""
+    now = now_iso().encode()
+    return Response(prefix + b',"' + key + b'":"' + now + b'"}', media_type="application/json")
+
+_POPULAR_ROUTES_PREFIX = _json_prefix({"popular_routes": popular_routes, "count": len(popular_routes)})
+_TRENDS_PREFIX = _json_prefix({"trends": trends})
+_PRICING_ANALYSIS_PREFIX = _json_prefix({"pricing_analysis": pricing_analysis})
+
+# Shared worker pool and service instances for background tasks
+executor = ThreadPoolExecutor(max_workers=8)
+_flight_scraper: "Optional[FlightScraper]" = None
+_openai_service: "Optional[OpenAIService]" = None
+
+def get_flight_scraper() -> "FlightScraper":
+    """Get the shared FlightScraper instance"""
+    global _flight_scraper
+    if _flight_scraper is None:
+        from .scrapers import FlightScraper
+        _flight_scraper = FlightScraper()
+    return _flight_scraper
+
+def get_openai_service() -> "OpenAIService":
+    """Get the shared OpenAIService instance"""
+    global _openai_service
+    if _openai_service is None:
+        from .services import OpenAIService
+        _openai_service = OpenAIService()
+    return _openai_service
+
+async def _load_flights() -> List[Dict[str, Any]]:
+    """Flight records for insight generation, built on the worker pool on first use"""
+    scraper = get_flight_scraper()
+    return await asyncio.get_running_loop().run_in_executor(executor, lambda: scraper.sample_flight_data)
+
+# Precomputed lookup indices over sample_flights (normalized key -> row indices)
+_by_origin: Dict[str, List[int]] = {}
+_by_dest: Dict[str, List[int]] = {}
+_by_class: Dict[str, List[int]] = {}
+for _idx, _flight in enumerate(sample_flights):
+    _by_origin.setdefault(_flight["origin"].upper(), []).append(_idx)
+    _by_dest.setdefault(_flight["destination"].upper(), []).append(_idx)
+    _by_class.setdefault(_flight["class_type"].lower(), []).append(_idx)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -126,44 +297,65 @@ async def root():
         "message": "Airline Data Insights API",
         "version": "1.0.0",
         "status": "active",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso(1.0)
     }
 
 # Health check endpoint
+_health_body = b""
+_health_iso = ""
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "service": "airline-insights-api"
-    }
+    global _health_body, _health_iso
+    timestamp = now_iso(1.0)
+    if timestamp != _health_iso:
+        _health_body = orjson.dumps({
+            "status": "healthy",
+            "timestamp": timestamp,
+            "service": "airline-insights-api",
+            "openai_max_concurrency": settings.OPENAI_MAX_CONCURRENCY
+        })
+        _health_iso = timestamp
+    return Response(_health_body, media_type="application/json")
 
 # Flight search endpoint
 @app.post("/api/flights/search")
 async def search_flights(request: FlightSearchRequest):
     """Search for flights based on criteria"""
     try:
-        # Filter sample flights based on request
-        filtered_flights = sample_flights.copy()
+        # Normalize the request fields once
+        origin_u = request.origin.upper() if request.origin else None
+        dest_u = request.destination.upper() if request.destination else None
+        class_l = request.class_type.lower() if request.class_type else None
         
-        # Apply filters if provided
-        if request.origin:
-            filtered_flights = [f for f in filtered_flights if f["origin"] == request.origin.upper()]
-        if request.destination:
-            filtered_flights = [f for f in filtered_flights if f["destination"] == request.destination.upper()]
-        if request.class_type:
-            filtered_flights = [f for f in filtered_flights if f["class_type"] == request.class_type.lower()]
+        # Gather candidate row indices from the filters that are set
+        candidates = []
+        if origin_u:
+            candidates.append(_by_origin.get(origin_u, ()))
+        if dest_u:
+            candidates.append(_by_dest.get(dest_u, ()))
+        if class_l:
+            candidates.append(_by_class.get(class_l, ()))
+        
+        if candidates:
+            idxs = set(candidates[0]).intersection(*candidates[1:])
+            filtered_flights = [sample_flights[i] for i in sorted(idxs)]
+        else:
+            filtered_flights = sample_flights
+        
+        search_criteria = request.model_dump(mode="python")
         
         logger.info(f"Flight search request: {request}")
         logger.info(f"Found {len(filtered_flights)} flights")
         
-        return {
+        # Plain JSON types only, so skip jsonable_encoder and let orjson format the datetime
+        return ORJSONResponse({
             "flights": filtered_flights,
             "count": len(filtered_flights),
-            "search_criteria": request.dict(),
-            "timestamp": datetime.now().isoformat()
-        }
+            "search_criteria": search_criteria,
+            "timestamp": datetime.now()
+        })
     except Exception as e:
         logger.error(f"Error searching flights: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error searching flights: {str(e)}")
@@ -172,97 +364,30 @@ async def search_flights(request: FlightSearchRequest):
 @app.get("/api/routes/popular")
 async def get_popular_routes():
     """Get popular flight routes"""
-    try:
-        popular_routes = [
-            {"route": "JFK → LAX", "passengers": 15420, "avg_price": 299.99, "growth": 12.5},
-            {"route": "LAX → JFK", "passengers": 14890, "avg_price": 289.99, "growth": 8.3},
-            {"route": "ORD → LAX", "passengers": 13210, "avg_price": 279.99, "growth": 15.2},
-            {"route": "ATL → LAX", "passengers": 12850, "avg_price": 259.99, "growth": 6.8},
-            {"route": "JFK → SFO", "passengers": 11940, "avg_price": 319.99, "growth": 9.7}
-        ]
-        
-        return {
-            "popular_routes": popular_routes,
-            "count": len(popular_routes),
-            "timestamp": datetime.now().isoformat()
-        }
-    except Exception as e:
-        logger.error(f"Error getting popular routes: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error getting popular routes: {str(e)}")
+    return _timestamped_response(_POPULAR_ROUTES_PREFIX, b"timestamp")
 
 # Trends endpoint
 @app.get("/api/insights/trends")
 async def get_trends():
     """Get airline industry trends"""
-    try:
-        trends = {
-            "price_trends": {
-                "overall_change": "+8.5%",
-                "domestic_change": "+5.2%",
-                "international_change": "+12.3%",
-                "trend_period": "last_30_days"
-            },
-            "demand_patterns": {
-                "peak_days": ["Friday", "Sunday"],
-                "peak_months": ["July", "December"],
-                "seasonal_factor": 1.15
-            },
-            "popular_destinations": [
-                {"destination": "LAX", "growth": 15.2},
-                {"destination": "JFK", "growth": 12.1},
-                {"destination": "ORD", "growth": 9.8},
-                {"destination": "ATL", "growth": 8.5}
-            ]
-        }
-        
-        return {
-            "trends": trends,
-            "generated_at": datetime.now().isoformat()
-        }
-    except Exception as e:
-        logger.error(f"Error getting trends: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error getting trends: {str(e)}")
+    return _timestamped_response(_TRENDS_PREFIX, b"generated_at")
 
 # Pricing analysis endpoint
 @app.get("/api/insights/pricing")
 async def get_pricing_analysis():
     """Get pricing analysis and predictions"""
-    try:
-        pricing_analysis = {
-            "current_avg_price": 289.99,
-            "price_change_24h": "+2.5%",
-            "price_change_7d": "+5.8%",
-            "price_change_30d": "+8.5%",
-            "price_prediction": {
-                "next_week": 295.50,
-                "next_month": 305.75,
-                "confidence": 0.85
-            },
-            "price_ranges": {
-                "budget": {"min": 199, "max": 249},
-                "standard": {"min": 250, "max": 399},
-                "premium": {"min": 400, "max": 699}
-            }
-        }
-        
-        return {
-            "pricing_analysis": pricing_analysis,
-            "generated_at": datetime.now().isoformat()
-        }
-    except Exception as e:
-        logger.error(f"Error getting pricing analysis: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error getting pricing analysis: {str(e)}")
+    return _timestamped_response(_PRICING_ANALYSIS_PREFIX, b"generated_at")
 
 # Scraping status endpoint
 @app.get("/api/scrape/status")
 async def get_scraping_status():
     """Get current scraping status"""
-    return {
+    return ORJSONResponse({
         "status": "idle",
         "message": "Scraping service is ready",
         "progress": 0.0,
-        "last_updated": datetime.now().isoformat()
-    }
+        "last_updated": datetime.now()
+    })
 
 # Trigger scraping endpoint
 @app.post("/api/scrape/trigger")
@@ -272,11 +397,11 @@ async def trigger_scraping(background_tasks: BackgroundTasks):
         # Add background task for scraping
         background_tasks.add_task(run_scraping_task)
         
-        return {
+        return ORJSONResponse({
             "status": "started",
             "message": "Scraping process has been triggered",
-            "timestamp": datetime.now().isoformat()
-        }
+            "timestamp": datetime.now()
+        })
     except Exception as e:
         logger.error(f"Error triggering scraping: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error triggering scraping: {str(e)}")
@@ -286,10 +411,12 @@ async def run_scraping_task():
     """Background task to run scraping process"""
     try:
         logger.info("Starting scraping task...")
-        # Simulate scraping process
-        import asyncio
-        await asyncio.sleep(5)  # Simulate work
-        logger.info("Scraping task completed")
+        # Blocking scraper work runs on the worker pool, off the event loop
+        scraper = get_flight_scraper()
+        scraper.clear_cache()
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(executor, scraper.get_all_data)
+        logger.info(f"Scraping task completed ({len(data['flights'])} flights)")
     except Exception as e:
         logger.error(f"Error in scraping task: {str(e)}")
 
@@ -300,26 +427,53 @@ async def generate_insights(background_tasks: BackgroundTasks):
     try:
         background_tasks.add_task(generate_ai_insights)
         
-        return {
+        return ORJSONResponse({
             "status": "started",
             "message": "AI insights generation has been triggered",
-            "timestamp": datetime.now().isoformat()
-        }
+            "timestamp": datetime.now()
+        })
     except Exception as e:
         logger.error(f"Error generating insights: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating insights: {str(e)}")
 
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@app.get("/api/insights/stream")
+async def stream_insights():
+    """Stream AI flight insights as server-sent events"""
+    flights = await _load_flights()
+    service = get_openai_service()
+    
+    if not service.use_openai:
+        # Nothing to stream: send the pre-serialized mock as a single event
+        body = b'data: {"insights":' + service.mock_insights_json("flight", flights) + b'}\n\n'
+        return Response(body, media_type="text/event-stream", headers=_SSE_HEADERS)
+    
+    async def events():
+        async for event in service.stream_flight_insights(flights):
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
 async def generate_ai_insights():
     """Background task to generate AI insights"""
     try:
         logger.info("Starting AI insights generation...")
-        # Simulate AI processing
-        import asyncio
-        await asyncio.sleep(3)
-        logger.info("AI insights generation completed")
+        flights = await _load_flights()
+        insights = await get_openai_service().generate_flight_insights(flights)
+        logger.info(f"AI insights generation completed ({insights.get('insight_type', 'unknown')})")
     except Exception as e:
         logger.error(f"Error in AI insights generation: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # Run with `python -m app.main` from the backend directory
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count() or 1,
+        log_level="warning"
+    ) 
\ No newline at end of file
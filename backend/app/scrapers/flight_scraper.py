@@ -6,22 +6,59 @@ This module contains the FlightScraper class for collecting flight data from pub
 """
 
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
+from datetime import datetime
 import time
 import random
-import json
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
 from dataclasses import dataclass
-import re
+from functools import lru_cache, partial
+from operator import attrgetter
+from cachetools import TTLCache, cachedmethod
+from cachetools.keys import hashkey
+from .http_client import get_session
+from ..lazy import load_numpy, load_pandas
+
+# numpy/pandas dominate cold-start time, so they are imported on first use
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+class _HostRateLimiter:
+    """Thread-safe limiter spacing requests to the same host by a minimum interval"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+    
+    def wait(self, url: str) -> None:
+        """Block until the next request slot for the URL's host"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            # Reserve the slot so concurrent callers for this host queue up behind it
+            self._next_slot[host] = slot + self.interval + random.uniform(0, 1)
+        if slot > now:
+            time.sleep(slot - now)
+
+# Records of one scrape share a timestamp, so parse each distinct string once
+_parse_timestamp = lru_cache(maxsize=256)(datetime.fromisoformat)
+
+@dataclass(frozen=True)
 class FlightInfo:
     """Data class for flight information"""
+    # Explicit slots (dataclass(slots=True) needs Python 3.10; the image runs 3.9)
+    __slots__ = (
+        "flight_id", "airline", "origin", "destination", "departure_time", "arrival_time",
+        "duration", "price", "currency", "class_type", "stops", "scraped_at"
+    )
+    
     flight_id: str
     airline: str
     origin: str
@@ -35,6 +72,121 @@ class FlightInfo:
     stops: int
     scraped_at: datetime
 
+def _generate_sample_flight_data() -> List[Dict[str, Any]]:
+    """Generate sample flight data for demonstration purposes"""
+    np = load_numpy()
+    
+    airlines = [
+        "American Airlines", "Delta Air Lines", "United Airlines", 
+        "Southwest Airlines", "JetBlue Airways", "Alaska Airlines",
+        "Spirit Airlines", "Frontier Airlines"
+    ]
+    
+    routes = [
+        ("JFK", "LAX"), ("LAX", "JFK"), ("ORD", "LAX"), ("ATL", "LAX"),
+        ("JFK", "SFO"), ("LAX", "SFO"), ("ORD", "ATL"), ("JFK", "MIA"),
+        ("LAX", "SEA"), ("DEN", "LAX"), ("JFK", "BOS"), ("LAX", "LAS"),
+        ("ORD", "DFW"), ("ATL", "MIA"), ("SFO", "SEA"), ("DEN", "PHX")
+    ]
+    
+    n = 100  # Generate 100 sample flights
+    rng = np.random.default_rng()
+    
+    airline_idx = rng.integers(0, len(airlines), n)
+    route_idx = rng.integers(0, len(routes), n)
+    
+    # Generate flight times
+    base_date = np.datetime64(datetime.now().date(), "s")
+    departure_times = (
+        base_date
+        + rng.integers(0, 31, n).astype("timedelta64[D]")
+        + rng.integers(6, 23, n).astype("timedelta64[h]")
+        + rng.choice([0, 15, 30, 45], n).astype("timedelta64[m]")
+    )
+    
+    # Calculate arrival time (3-6 hours flight duration)
+    flight_duration_hours = rng.integers(3, 7, n)
+    arrival_times = departure_times + flight_duration_hours.astype("timedelta64[h]")
+    duration_minutes = rng.integers(0, 60, n)
+    
+    # Generate price based on route and airline
+    budget_idx = [airlines.index(a) for a in ("Spirit Airlines", "Frontier Airlines")]
+    premium_idx = [airlines.index(a) for a in ("American Airlines", "Delta Air Lines", "United Airlines")]
+    multiplier = np.where(
+        np.isin(airline_idx, budget_idx), 0.7,  # Budget airlines
+        np.where(np.isin(airline_idx, premium_idx), 1.1, 1.0)  # Premium airlines
+    )
+    prices = np.round(rng.integers(200, 801, n).astype(float) * multiplier, 2)
+    
+    class_types = rng.choice(["economy", "premium_economy", "business"], n)
+    stops = rng.integers(0, 3, n)
+    
+    # Flight ids: airline prefix + 3-digit number, concatenated in NumPy
+    prefixes = np.array([a[:2].upper() for a in airlines])
+    flight_ids = np.char.add(prefixes[airline_idx], rng.integers(100, 1000, n).astype(str))
+    scraped_at = datetime.now().isoformat()
+    
+    return [
+        {
+            "flight_id": flight_id,
+            "airline": airlines[a],
+            "origin": routes[r][0],
+            "destination": routes[r][1],
+            "departure_time": dep,
+            "arrival_time": arr,
+            "duration": f"{hours}h {minutes}m",
+            "price": price,
+            "currency": "USD",
+            "class_type": class_type,
+            "stops": stop_count,
+            "scraped_at": scraped_at
+        }
+        for flight_id, a, r, dep, arr, hours, minutes, price, class_type, stop_count in zip(
+            flight_ids.tolist(),
+            airline_idx.tolist(), route_idx.tolist(),
+            departure_times.astype(str).tolist(), arrival_times.astype(str).tolist(),
+            flight_duration_hours.tolist(), duration_minutes.tolist(),
+            prices.tolist(), class_types.tolist(), stops.tolist()
+        )
+    ]
+
+# Shared sample data, generated once per process on first access
+_sample_flight_data = lru_cache(maxsize=None)(_generate_sample_flight_data)
+
+# Airport codes are mapped to small ints at ingest so route lookups hash int tuples
+_RouteIndex = Tuple[Dict[str, int], Dict[Tuple[int, int], List[int]]]
+
+@lru_cache(maxsize=None)
+def _sample_route_index() -> _RouteIndex:
+    """
+    Map the sample airport codes to ids and index the shared sample flights by (origin_id, dest_id).
+    
+    Both tables are built locally and returned together: lru_cache doesn't serialize the first
+    concurrent calls from executor threads, and a shared id table could hand two codes one id.
+    """
+    code_to_id: Dict[str, int] = {}
+    index: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for idx, flight in enumerate(_sample_flight_data()):
+        origin_id = code_to_id.setdefault(flight["origin"], len(code_to_id))
+        dest_id = code_to_id.setdefault(flight["destination"], len(code_to_id))
+        index[(origin_id, dest_id)].append(idx)
+    return code_to_id, dict(index)
+
+def _build_flight_frame(flights: List[Dict[str, Any]]) -> "pd.DataFrame":
+    """Build a columnar view of the flights used by the analytic methods"""
+    df = load_pandas().DataFrame(
+        flights, columns=["airline", "origin", "destination", "price", "class_type", "stops"]
+    )
+    df["route_key"] = df["origin"] + "-" + df["destination"]
+    for col in ("airline", "origin", "destination", "route_key", "class_type"):
+        df[col] = df[col].astype("category")
+    return df
+
+@lru_cache(maxsize=None)
+def _sample_flight_frame() -> "pd.DataFrame":
+    """Columnar view of the shared sample flights, built on first analytic call"""
+    return _build_flight_frame(_sample_flight_data())
+
 class FlightScraper:
     """
     Flight data scraper for collecting airline information from public sources.
@@ -53,75 +205,48 @@ class FlightScraper:
         """
         self.delay = delay
         self.max_retries = max_retries
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session = get_session(max_retries)
+        self._limiter = _HostRateLimiter(delay)
         
-        # Sample data for demonstration (in production, this would come from real scraping)
-        self.sample_flight_data = self._generate_sample_data()
+        # Short-lived cache for the summary methods below; the lock guards it because
+        # get_all_data runs on worker threads while clear_cache runs on the event loop
+        self._cache = TTLCache(maxsize=16, ttl=60)
+        self._cache_lock = threading.Lock()
     
-    def _generate_sample_data(self) -> List[Dict[str, Any]]:
-        """Generate sample flight data for demonstration purposes"""
-        airlines = [
-            "American Airlines", "Delta Air Lines", "United Airlines", 
-            "Southwest Airlines", "JetBlue Airways", "Alaska Airlines",
-            "Spirit Airlines", "Frontier Airlines"
-        ]
-        
-        routes = [
-            ("JFK", "LAX"), ("LAX", "JFK"), ("ORD", "LAX"), ("ATL", "LAX"),
-            ("JFK", "SFO"), ("LAX", "SFO"), ("ORD", "ATL"), ("JFK", "MIA"),
-            ("LAX", "SEA"), ("DEN", "LAX"), ("JFK", "BOS"), ("LAX", "LAS"),
-            ("ORD", "DFW"), ("ATL", "MIA"), ("SFO", "SEA"), ("DEN", "PHX")
-        ]
-        
-        flights = []
-        base_date = datetime.now()
+    @property
+    def sample_flight_data(self) -> List[Dict[str, Any]]:
+        """Sample data for demonstration (in production, this would come from real scraping)"""
+        return _sample_flight_data()
+    
+    @property
+    def _df(self) -> "pd.DataFrame":
+        return _sample_flight_frame()
+    
+    @property
+    def _route_index(self) -> _RouteIndex:
+        return _sample_route_index()
+    
+    def scrape_flights_raw(self, origin: str, destination: str) -> List[Dict[str, Any]]:
+        """
+        Scrape flight records for a specific route without wrapping them.
         
-        for i in range(100):  # Generate 100 sample flights
-            airline = random.choice(airlines)
-            origin, destination = random.choice(routes)
-            
-            # Generate flight times
-            departure_hour = random.randint(6, 22)
-            departure_minute = random.choice([0, 15, 30, 45])
-            departure_time = base_date.replace(
-                hour=departure_hour, 
-                minute=departure_minute, 
-                second=0, 
-                microsecond=0
-            ) + timedelta(days=random.randint(0, 30))
-            
-            # Calculate arrival time (3-6 hours flight duration)
-            flight_duration_hours = random.randint(3, 6)
-            arrival_time = departure_time + timedelta(hours=flight_duration_hours)
-            
-            # Generate price based on route and airline
-            base_price = random.randint(200, 800)
-            if airline in ["Spirit Airlines", "Frontier Airlines"]:
-                base_price *= 0.7  # Budget airlines
-            elif airline in ["American Airlines", "Delta Air Lines", "United Airlines"]:
-                base_price *= 1.1  # Premium airlines
-            
-            flight = {
-                "flight_id": f"{airline[:2].upper()}{random.randint(100, 999)}",
-                "airline": airline,
-                "origin": origin,
-                "destination": destination,
-                "departure_time": departure_time.isoformat(),
-                "arrival_time": arrival_time.isoformat(),
-                "duration": f"{flight_duration_hours}h {random.randint(0, 59)}m",
-                "price": round(base_price, 2),
-                "currency": "USD",
-                "class_type": random.choice(["economy", "premium_economy", "business"]),
-                "stops": random.choice([0, 1, 2]),
-                "scraped_at": datetime.now().isoformat()
-            }
+        Args:
+            origin: Origin airport code
+            destination: Destination airport code
             
-            flights.append(flight)
-        
-        return flights
+        Returns:
+            List of flight dictionaries (shared records, treat as read-only)
+        """
+        # In a real implementation, this would scrape actual websites
+        # For now, we'll look the route up in our sample data index
+        # Unknown codes can't be in the index
+        code_to_id, route_index = self._route_index
+        origin_id = code_to_id.get(origin.upper())
+        dest_id = code_to_id.get(destination.upper())
+        if origin_id is None or dest_id is None:
+            return []
+        idxs = route_index.get((origin_id, dest_id), ())
+        return [self.sample_flight_data[i] for i in idxs]
     
     def scrape_flights(self, origin: str, destination: str, 
                       departure_date: Optional[str] = None,
@@ -141,29 +266,10 @@ class FlightScraper:
         logger.info(f"Scraping flights from {origin} to {destination}")
         
         try:
-            # In a real implementation, this would scrape actual websites
-            # For now, we'll filter our sample data
-            filtered_flights = []
-            
-            for flight_data in self.sample_flight_data:
-                if (flight_data["origin"] == origin.upper() and 
-                    flight_data["destination"] == destination.upper()):
-                    
-                    flight_info = FlightInfo(
-                        flight_id=flight_data["flight_id"],
-                        airline=flight_data["airline"],
-                        origin=flight_data["origin"],
-                        destination=flight_data["destination"],
-                        departure_time=flight_data["departure_time"],
-                        arrival_time=flight_data["arrival_time"],
-                        duration=flight_data["duration"],
-                        price=flight_data["price"],
-                        currency=flight_data["currency"],
-                        class_type=flight_data["class_type"],
-                        stops=flight_data["stops"],
-                        scraped_at=datetime.fromisoformat(flight_data["scraped_at"])
-                    )
-                    filtered_flights.append(flight_info)
+            filtered_flights = [
+                self._to_flight_info(flight_data)
+                for flight_data in self.scrape_flights_raw(origin, destination)
+            ]
             
             logger.info(f"Found {len(filtered_flights)} flights")
             return filtered_flights
@@ -172,6 +278,30 @@ class FlightScraper:
             logger.error(f"Error scraping flights: {str(e)}")
             return []
     
+    @staticmethod
+    def _to_flight_info(flight_data: Dict[str, Any]) -> FlightInfo:
+        """Wrap a raw flight record in a FlightInfo"""
+        return FlightInfo(
+            flight_id=flight_data["flight_id"],
+            airline=flight_data["airline"],
+            origin=flight_data["origin"],
+            destination=flight_data["destination"],
+            departure_time=flight_data["departure_time"],
+            arrival_time=flight_data["arrival_time"],
+            duration=flight_data["duration"],
+            price=flight_data["price"],
+            currency=flight_data["currency"],
+            class_type=flight_data["class_type"],
+            stops=flight_data["stops"],
+            scraped_at=_parse_timestamp(flight_data["scraped_at"])
+        )
+    
+    def clear_cache(self) -> None:
+        """Drop cached summaries so the next call recomputes them"""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    @cachedmethod(attrgetter("_cache"), key=partial(hashkey, "popular_routes"), lock=attrgetter("_cache_lock"))
     def scrape_popular_routes(self) -> List[Dict[str, Any]]:
         """
         Scrape popular flight routes data.
@@ -182,47 +312,35 @@ class FlightScraper:
         logger.info("Scraping popular routes")
         
         try:
-            # Analyze sample data to find popular routes
-            route_stats = {}
-            
-            for flight in self.sample_flight_data:
-                route_key = f"{flight['origin']} → {flight['destination']}"
-                
-                if route_key not in route_stats:
-                    route_stats[route_key] = {
-                        "route": route_key,
-                        "flight_count": 0,
-                        "total_price": 0,
-                        "passengers": 0
-                    }
-                
-                route_stats[route_key]["flight_count"] += 1
-                route_stats[route_key]["total_price"] += flight["price"]
-                route_stats[route_key]["passengers"] += random.randint(100, 500)
+            # Aggregate flights per route and simulate passengers/growth
+            stats = self._df.groupby(["origin", "destination"], sort=False, observed=True)["price"].agg(["size", "mean"])
+            sizes = stats["size"].to_numpy()
+            rng = load_numpy().random.default_rng()
+            stats["passengers"] = rng.integers(100 * sizes, 500 * sizes + 1)
+            stats["growth"] = rng.uniform(5.0, 20.0, len(stats))  # Simulated growth
             
-            # Calculate averages and sort by popularity
-            popular_routes = []
-            for route_data in route_stats.values():
-                avg_price = route_data["total_price"] / route_data["flight_count"]
-                growth = random.uniform(5.0, 20.0)  # Simulated growth
-                
-                popular_routes.append({
-                    "route": route_data["route"],
-                    "passengers": route_data["passengers"],
+            # Keep the top 10 routes by passenger count
+            top = stats.nlargest(10, "passengers")
+            popular_routes = [
+                {
+                    "route": f"{origin} → {destination}",
+                    "passengers": passengers,
                     "avg_price": round(avg_price, 2),
                     "growth": round(growth, 1)
-                })
-            
-            # Sort by passenger count and return top 10
-            popular_routes.sort(key=lambda x: x["passengers"], reverse=True)
+                }
+                for (origin, destination), passengers, avg_price, growth in zip(
+                    top.index, top["passengers"].tolist(), top["mean"].tolist(), top["growth"].tolist()
+                )
+            ]
             
-            logger.info(f"Found {len(popular_routes)} popular routes")
-            return popular_routes[:10]
+            logger.info(f"Found {len(stats)} popular routes")
+            return popular_routes
             
         except Exception as e:
             logger.error(f"Error scraping popular routes: {str(e)}")
             return []
     
+    @cachedmethod(attrgetter("_cache"), key=partial(hashkey, "price_trends"), lock=attrgetter("_cache_lock"))
     def scrape_price_trends(self) -> Dict[str, Any]:
         """
         Scrape price trend data.
@@ -234,12 +352,12 @@ class FlightScraper:
         
         try:
             # Analyze sample data for price trends
-            prices = [flight["price"] for flight in self.sample_flight_data]
+            prices = self._df["price"].to_numpy()
             
             trends = {
-                "average_price": round(sum(prices) / len(prices), 2),
-                "min_price": min(prices),
-                "max_price": max(prices),
+                "average_price": round(float(prices.mean()), 2),
+                "min_price": float(prices.min()),
+                "max_price": float(prices.max()),
                 "price_change_24h": f"+{random.uniform(1, 5):.1f}%",
                 "price_change_7d": f"+{random.uniform(3, 10):.1f}%",
                 "price_change_30d": f"+{random.uniform(5, 15):.1f}%",
@@ -254,6 +372,7 @@ class FlightScraper:
             logger.error(f"Error scraping price trends: {str(e)}")
             return {}
     
+    @cachedmethod(attrgetter("_cache"), key=partial(hashkey, "airline_data"), lock=attrgetter("_cache_lock"))
     def scrape_airline_data(self) -> List[Dict[str, Any]]:
         """
         Scrape airline-specific data.
@@ -264,39 +383,19 @@ class FlightScraper:
         logger.info("Scraping airline data")
         
         try:
-            airline_stats = {}
-            
-            for flight in self.sample_flight_data:
-                airline = flight["airline"]
-                
-                if airline not in airline_stats:
-                    airline_stats[airline] = {
-                        "airline": airline,
-                        "flight_count": 0,
-                        "total_price": 0,
-                        "routes": set()
-                    }
-                
-                airline_stats[airline]["flight_count"] += 1
-                airline_stats[airline]["total_price"] += flight["price"]
-                airline_stats[airline]["routes"].add(f"{flight['origin']}-{flight['destination']}")
-            
-            # Convert to list format
-            airline_data = []
-            for stats in airline_stats.values():
-                avg_price = stats["total_price"] / stats["flight_count"]
-                market_share = (stats["flight_count"] / len(self.sample_flight_data)) * 100
-                
-                airline_data.append({
-                    "airline": stats["airline"],
-                    "flight_count": stats["flight_count"],
-                    "avg_price": round(avg_price, 2),
-                    "route_count": len(stats["routes"]),
-                    "market_share": round(market_share, 1)
-                })
+            stats = self._df.groupby("airline", sort=False, observed=True).agg(
+                flight_count=("price", "size"),
+                avg_price=("price", "mean"),
+                route_count=("route_key", "nunique")
+            )
+            stats["avg_price"] = stats["avg_price"].round(2)
+            stats["market_share"] = (stats["flight_count"] / len(self._df) * 100).round(1)
             
             # Sort by market share
-            airline_data.sort(key=lambda x: x["market_share"], reverse=True)
+            stats = stats.sort_values("market_share", ascending=False, kind="stable")
+            airline_data = stats.reset_index()[
+                ["airline", "flight_count", "avg_price", "route_count", "market_share"]
+            ].to_dict(orient="records")
             
             logger.info(f"Found data for {len(airline_data)} airlines")
             return airline_data
@@ -333,20 +432,13 @@ class FlightScraper:
         Returns:
             Response object or None if failed
         """
-        for attempt in range(self.max_retries):
-            try:
-                time.sleep(self.delay + random.uniform(0, 1))
-                response = self.session.get(url, **kwargs)
-                response.raise_for_status()
-                return response
-                
-            except requests.RequestException as e:
-                logger.warning(f"Request attempt {attempt + 1} failed: {str(e)}")
-                if attempt == self.max_retries - 1:
-                    logger.error(f"All retry attempts failed for {url}")
-                    return None
-                
-                # Exponential backoff
-                time.sleep(2 ** attempt)
-        
-        return None 
\ No newline at end of file
+        # Retries with exponential backoff are handled by the session's adapter
+        try:
+            self._limiter.wait(url)
+            response = self.session.get(url, **kwargs)
+            response.raise_for_status()
+            return response
+            
+        except requests.RequestException as e:
+            logger.error(f"All retry attempts failed for {url}: {str(e)}")
+            return None 
\ No newline at end of file
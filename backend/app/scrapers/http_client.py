@@ -0,0 +1,53 @@
+"""
+Shared HTTP Client
+==================
+
+This module holds the pooled requests session shared by all scrapers.
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, Final
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Headers sent with every scraper request; SCRAPER_USER_AGENT overrides the UA centrally
+_DEFAULT_HEADERS: Final[Dict[str, str]] = {
+    'User-Agent': os.getenv(
+        "SCRAPER_USER_AGENT",
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    )
+}
+
+# Retry budget of the shared session (the scrapers' max_retries default)
+DEFAULT_MAX_RETRIES: Final[int] = 3
+
+def _build_session(max_retries: int = DEFAULT_MAX_RETRIES) -> requests.Session:
+    """Build a pooled HTTP session with keep-alive and retry/backoff"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(_DEFAULT_HEADERS)
+    return session
+
+# Shared across all scrapers so connections are reused
+SESSION = _build_session()
+
+# One extra pooled session per non-default retry budget
+_session_with_retries = lru_cache(maxsize=None)(_build_session)
+
+def get_session(max_retries: int = DEFAULT_MAX_RETRIES) -> requests.Session:
+    """Return the shared session, or a pooled one with its own retry budget for a non-default max_retries"""
+    if max_retries == DEFAULT_MAX_RETRIES:
+        return SESSION
+    return _session_with_retries(max_retries)
@@ -5,23 +5,74 @@ Route Data Scraper
 This module contains the RouteScraper class for collecting route and airline network data.
 """
 
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+import asyncio
+import httpx
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Sequence, TYPE_CHECKING
+from datetime import datetime
 import time
-import random
-import json
+import itertools
+import heapq
+import math
+from operator import itemgetter
 from dataclasses import dataclass
-import networkx as nx
+from functools import cached_property
+from types import MappingProxyType
+from urllib.parse import quote
+import orjson
+from .http_client import get_session
+from ..lazy import load_numpy, load_pandas
+
+# numpy/pandas/scipy/networkx dominate cold-start time, so they are imported on first use
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Source rows per shortest-path block in analyze_route_network
+_PATH_BLOCK_SIZE = 256
+
+# Above this many airports, hub centrality is approximated by pivot sampling
+_EXACT_BETWEENNESS_MAX_NODES = 200
+
+# Major airport hubs
+_HUBS = MappingProxyType({
+    "ATL": {"city": "Atlanta", "region": "Southeast"},
+    "LAX": {"city": "Los Angeles", "region": "West Coast"},
+    "ORD": {"city": "Chicago", "region": "Midwest"},
+    "DFW": {"city": "Dallas", "region": "Southwest"},
+    "DEN": {"city": "Denver", "region": "Mountain"},
+    "JFK": {"city": "New York", "region": "Northeast"},
+    "SFO": {"city": "San Francisco", "region": "West Coast"},
+    "SEA": {"city": "Seattle", "region": "Pacific Northwest"},
+    "MIA": {"city": "Miami", "region": "Southeast"},
+    "BOS": {"city": "Boston", "region": "Northeast"}
+})
+
+# Every ordered pair of hubs is a route (both directions)
+_HUB_PAIRS = tuple(itertools.permutations(_HUBS, 2))
+
+_AIRLINES = (
+    "American Airlines", "Delta Air Lines", "United Airlines", 
+    "Southwest Airlines", "JetBlue Airways", "Alaska Airlines",
+    "Spirit Airlines", "Frontier Airlines"
+)
+_SEASONS = ("Summer", "Winter", "Spring", "Fall")
+_LOW_COST = frozenset(("Spirit Airlines", "Frontier Airlines"))
+_MAJOR = frozenset(("American Airlines", "Delta Air Lines", "United Airlines"))
+
+# Price multiplier per airline in _AIRLINES order (budget 0.7, major 1.1, others 1.0)
+_PRICE_MULT = tuple(0.7 if a in _LOW_COST else 1.1 if a in _MAJOR else 1.0 for a in _AIRLINES)
+
+@dataclass(frozen=True)
 class RouteInfo:
     """Data class for route information"""
+    # Explicit slots (dataclass(slots=True) needs Python 3.10; the image runs 3.9)
+    __slots__ = (
+        "origin", "destination", "airline", "frequency", "avg_price",
+        "peak_season", "demand_score", "scraped_at"
+    )
     origin: str
     destination: str
     airline: str
@@ -31,6 +82,34 @@ class RouteInfo:
     demand_score: float
     scraped_at: datetime
 
+class RateLimiter:
+    """
+    Token-bucket limiter for the async scrape path.
+    
+    Refill and take happen with no await in between, so a single event loop
+    needs no lock and the limiter works across separate asyncio.run calls.
+    """
+    
+    def __init__(self, requests_per_second: float, capacity: float = 1.0):
+        self.requests_per_second = requests_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+    
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.last_refill) * self.requests_per_second
+            )
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.requests_per_second)
+
 class RouteScraper:
     """
     Route data scraper for collecting airline route information and network analysis.
@@ -49,87 +128,119 @@ class RouteScraper:
         """
         self.delay = delay
         self.max_retries = max_retries
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session = get_session(max_retries)
+        self._limiter = RateLimiter(requests_per_second=1 / delay) if delay > 0 else None
         
-        # Sample route data for demonstration
-        self.sample_route_data = self._generate_sample_routes()
+        # Memoized analysis results; the route list never changes after construction
+        self._cache: Dict[str, Any] = {}
     
-    def _generate_sample_routes(self) -> List[Dict[str, Any]]:
-        """Generate sample route data for demonstration purposes"""
+    def clear_cache(self) -> None:
+        """Drop memoized analyses so the next call recomputes them"""
+        self._cache.clear()
+    
+    @property
+    def sample_route_data(self) -> List[Dict[str, Any]]:
+        """Sample route data for demonstration, materialized from the route frame on each call"""
+        return self._route_records()
+    
+    @cached_property
+    def _by_airline(self) -> Dict[str, "np.ndarray"]:
+        """Row indices into the route frame per airline, so per-airline lookups only touch matching routes"""
+        return self._df.groupby("airline", observed=True).indices
+    
+    @cached_property
+    def _by_origin(self) -> Dict[str, "np.ndarray"]:
+        """Row indices into the route frame per origin airport"""
+        return self._df.groupby("origin", observed=True).indices
+    
+    @cached_property
+    def _df(self) -> "pd.DataFrame":
+        """
+        The routes, stored column-wise; generated on first use.
         
-        # Major airport hubs
-        hubs = {
-            "ATL": {"city": "Atlanta", "region": "Southeast"},
-            "LAX": {"city": "Los Angeles", "region": "West Coast"},
-            "ORD": {"city": "Chicago", "region": "Midwest"},
-            "DFW": {"city": "Dallas", "region": "Southwest"},
-            "DEN": {"city": "Denver", "region": "Mountain"},
-            "JFK": {"city": "New York", "region": "Northeast"},
-            "SFO": {"city": "San Francisco", "region": "West Coast"},
-            "SEA": {"city": "Seattle", "region": "Pacific Northwest"},
-            "MIA": {"city": "Miami", "region": "Southeast"},
-            "BOS": {"city": "Boston", "region": "Northeast"}
-        }
+        This frame is the only copy of the route data. Airports share one
+        categorical dtype in first-seen order so their codes double as graph
+        node ids. Prices/demand stay float64 to keep the distribution bucket
+        edges exact.
+        """
+        return self._generate_sample_routes()
+    
+    def _route_records(self, rows: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Build route dictionaries from the route frame.
         
-        airlines = [
-            "American Airlines", "Delta Air Lines", "United Airlines", 
-            "Southwest Airlines", "JetBlue Airways", "Alaska Airlines",
-            "Spirit Airlines", "Frontier Airlines"
+        Args:
+            rows: Row indices to include (all routes if None)
+            
+        Returns:
+            List of route dictionaries
+        """
+        df = self._df if rows is None else self._df.iloc[rows]
+        scraped_at = self._df.attrs["scraped_at"]
+        return [
+            {
+                "origin": origin,
+                "destination": destination,
+                "origin_city": _HUBS[origin]["city"],
+                "destination_city": _HUBS[destination]["city"],
+                "airline": airline,
+                "frequency": frequency,
+                "avg_price": price,
+                "peak_season": peak_season,
+                "demand_score": demand_score,
+                "route_type": "domestic",
+                "scraped_at": scraped_at
+            }
+            for origin, destination, airline, frequency, price, peak_season, demand_score in zip(
+                df["origin"].tolist(), df["destination"].tolist(), df["airline"].tolist(),
+                df["frequency"].tolist(), df["avg_price"].tolist(), df["peak_season"].tolist(),
+                df["demand_score"].tolist()
+            )
         ]
+    
+    @staticmethod
+    def _generate_sample_routes() -> "pd.DataFrame":
+        """Generate sample route data for demonstration purposes"""
+        airports = list(_HUBS)
+        airlines = _AIRLINES
+        np = load_numpy()
+        pd = load_pandas()
+        rng = np.random.default_rng()
+        
+        # (origin, destination) airport codes of every hub pair
+        airport_id = {code: i for i, code in enumerate(airports)}
+        pairs = np.array([(airport_id[o], airport_id[d]) for o, d in _HUB_PAIRS], dtype=np.int8)
         
-        routes = []
-        airports = list(hubs.keys())
-        
-        # Generate routes between major hubs
-        for i, origin in enumerate(airports):
-            for destination in airports[i+1:]:
-                # Create bidirectional routes
-                for direction in [(origin, destination), (destination, origin)]:
-                    origin_code, dest_code = direction
-                    
-                    # Each route may be served by multiple airlines
-                    num_airlines = random.randint(1, 4)
-                    selected_airlines = random.sample(airlines, num_airlines)
-                    
-                    for airline in selected_airlines:
-                        # Calculate distance-based pricing
-                        base_price = random.randint(200, 800)
-                        
-                        # Adjust for airline type
-                        if airline in ["Spirit Airlines", "Frontier Airlines"]:
-                            base_price *= 0.7
-                        elif airline in ["American Airlines", "Delta Air Lines", "United Airlines"]:
-                            base_price *= 1.1
-                        
-                        # Flight frequency (flights per week)
-                        frequency = random.randint(7, 35)
-                        
-                        # Peak season
-                        peak_season = random.choice(["Summer", "Winter", "Spring", "Fall"])
-                        
-                        # Demand score (0-1)
-                        demand_score = random.uniform(0.3, 1.0)
-                        
-                        route = {
-                            "origin": origin_code,
-                            "destination": dest_code,
-                            "origin_city": hubs[origin_code]["city"],
-                            "destination_city": hubs[dest_code]["city"],
-                            "airline": airline,
-                            "frequency": frequency,
-                            "avg_price": round(base_price, 2),
-                            "peak_season": peak_season,
-                            "demand_score": round(demand_score, 2),
-                            "route_type": "domestic",
-                            "scraped_at": datetime.now().isoformat()
-                        }
-                        
-                        routes.append(route)
-        
-        return routes
+        # Each route may be served by 1-4 distinct airlines: shuffle every row of
+        # airline ids at once and keep the first k of each (row-major, like pair_idx)
+        num_airlines = rng.integers(1, 5, len(pairs))
+        pair_idx = np.repeat(np.arange(len(pairs)), num_airlines)
+        shuffled = np.argsort(rng.random((len(pairs), len(airlines))), axis=1)
+        airline_idx = shuffled[np.arange(len(airlines)) < num_airlines[:, None]]
+        n = len(pair_idx)
+        
+        # Calculate distance-based pricing, adjusted for airline type
+        prices = np.round(rng.integers(200, 801, n) * np.array(_PRICE_MULT)[airline_idx], 2)
+        
+        # Flight frequency (flights per week), peak season and demand score (0-1)
+        frequencies = rng.integers(7, 36, n).astype(np.int16)
+        season_idx = rng.integers(0, len(_SEASONS), n)
+        demand_scores = np.round(rng.uniform(0.3, 1.0, n), 2)
+        
+        # Hub order is first-seen order, since pairs are generated origin-major
+        airport_dtype = pd.CategoricalDtype(airports)
+        df = pd.DataFrame({
+            "origin": pd.Categorical.from_codes(pairs[pair_idx, 0], dtype=airport_dtype),
+            "destination": pd.Categorical.from_codes(pairs[pair_idx, 1], dtype=airport_dtype),
+            "airline": pd.Categorical.from_codes(airline_idx, categories=airlines),
+            "frequency": frequencies,
+            "avg_price": prices,
+            "peak_season": pd.Categorical.from_codes(season_idx, categories=_SEASONS),
+            "demand_score": demand_scores
+        })
+        # One timestamp for the whole scrape, kept as a datetime; serialized only at JSON egress
+        df.attrs["scraped_at"] = datetime.now()
+        return df
     
     def scrape_airline_routes(self, airline: str) -> List[RouteInfo]:
         """
@@ -146,19 +257,18 @@ class RouteScraper:
         try:
             airline_routes = []
             
-            for route_data in self.sample_route_data:
-                if route_data["airline"] == airline:
-                    route_info = RouteInfo(
-                        origin=route_data["origin"],
-                        destination=route_data["destination"],
-                        airline=route_data["airline"],
-                        frequency=route_data["frequency"],
-                        avg_price=route_data["avg_price"],
-                        peak_season=route_data["peak_season"],
-                        demand_score=route_data["demand_score"],
-                        scraped_at=datetime.fromisoformat(route_data["scraped_at"])
-                    )
-                    airline_routes.append(route_info)
+            for route_data in self._route_records(self._by_airline.get(airline, [])):
+                route_info = RouteInfo(
+                    origin=route_data["origin"],
+                    destination=route_data["destination"],
+                    airline=route_data["airline"],
+                    frequency=route_data["frequency"],
+                    avg_price=route_data["avg_price"],
+                    peak_season=route_data["peak_season"],
+                    demand_score=route_data["demand_score"],
+                    scraped_at=route_data["scraped_at"]
+                )
+                airline_routes.append(route_info)
             
             logger.info(f"Found {len(airline_routes)} routes for {airline}")
             return airline_routes
@@ -167,6 +277,64 @@ class RouteScraper:
             logger.error(f"Error scraping routes for {airline}: {str(e)}")
             return []
     
+    async def _afetch(self, client: httpx.AsyncClient, url: str) -> Optional[str]:
+        """
+        Fetch a page with the shared async client.
+        
+        Args:
+            client: Open httpx client
+            url: URL to fetch
+            
+        Returns:
+            Response body, or None if the request failed
+        """
+        if self._limiter is not None:
+            await self._limiter.acquire()
+        
+        try:
+            response = await client.get(url, timeout=15)
+            response.raise_for_status()
+            return response.text
+        except httpx.HTTPError as e:
+            logger.error(f"Request to {url} failed: {str(e)}")
+            return None
+    
+    async def scrape_airlines_bulk(self, airlines: List[str], base_url: str,
+                                   concurrency: int = 20) -> Dict[str, Optional[str]]:
+        """
+        Fetch route pages for many airlines concurrently.
+        
+        Args:
+            airlines: Airline names to fetch
+            base_url: Source URL; each airline is appended as a path segment
+            concurrency: Maximum number of requests in flight
+            
+        Returns:
+            Dictionary mapping airline to page body (None on failure)
+        """
+        logger.info(f"Bulk scraping routes for {len(airlines)} airlines")
+        
+        # Created here so it binds to the running loop
+        semaphore = asyncio.Semaphore(concurrency)
+        base_url = base_url.rstrip("/")
+        
+        async with httpx.AsyncClient(
+            headers=dict(self.session.headers),
+            limits=httpx.Limits(max_connections=50)
+        ) as client:
+            async def fetch_with_sem(airline: str) -> Optional[str]:
+                async with semaphore:
+                    return await self._afetch(client, f"{base_url}/{quote(airline)}")
+            
+            pages = await asyncio.gather(*[fetch_with_sem(a) for a in airlines])
+        
+        return dict(zip(airlines, pages))
+    
+    def scrape_airlines_bulk_sync(self, airlines: List[str], base_url: str,
+                                  concurrency: int = 20) -> Dict[str, Optional[str]]:
+        """Blocking wrapper around scrape_airlines_bulk for non-async callers"""
+        return asyncio.run(self.scrape_airlines_bulk(airlines, base_url, concurrency))
+    
     def scrape_airport_connections(self, airport: str) -> Dict[str, Any]:
         """
         Scrape connection data for a specific airport.
@@ -189,17 +357,16 @@ class RouteScraper:
                 "hub_score": 0
             }
             
-            for route_data in self.sample_route_data:
-                if route_data["origin"] == airport:
-                    connections["destinations"].append({
-                        "destination": route_data["destination"],
-                        "destination_city": route_data["destination_city"],
-                        "airline": route_data["airline"],
-                        "frequency": route_data["frequency"],
-                        "avg_price": route_data["avg_price"]
-                    })
-                    connections["airlines"].add(route_data["airline"])
-                    connections["total_routes"] += 1
+            for route_data in self._route_records(self._by_origin.get(airport, [])):
+                connections["destinations"].append({
+                    "destination": route_data["destination"],
+                    "destination_city": route_data["destination_city"],
+                    "airline": route_data["airline"],
+                    "frequency": route_data["frequency"],
+                    "avg_price": route_data["avg_price"]
+                })
+                connections["airlines"].add(route_data["airline"])
+                connections["total_routes"] += 1
             
             if connections["total_routes"] > 0:
                 connections["avg_frequency"] = sum(
@@ -230,46 +397,63 @@ class RouteScraper:
         Returns:
             Dictionary with network analysis results
         """
+        if "network" in self._cache:
+            return self._cache["network"]
+        
         logger.info("Analyzing route network")
         
+        import networkx as nx
+        from scipy import sparse
+        from scipy.sparse import csgraph
+        np = load_numpy()
+        
         try:
-            # Create network graph
-            G = nx.DiGraph()
+            # Airport category codes are the node ids; build a sparse adjacency matrix from them
+            origins = self._df["origin"]
+            airports = origins.cat.categories.tolist()
+            n = len(airports)
             
-            # Add edges (routes)
-            for route in self.sample_route_data:
-                G.add_edge(
-                    route["origin"], 
-                    route["destination"],
-                    airline=route["airline"],
-                    frequency=route["frequency"],
-                    price=route["avg_price"]
-                )
+            rows = origins.cat.codes.to_numpy()
+            cols = self._df["destination"].cat.codes.to_numpy()
+            A = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+            
+            # Create network graph
+            G = nx.from_scipy_sparse_array(A, create_using=nx.DiGraph)
             
             # Calculate network metrics
-            centrality = nx.betweenness_centrality(G)
-            degree_centrality = nx.degree_centrality(G)
+            # Exact betweenness is O(V*E); sample sqrt(V) pivots once the network is large
+            if n > _EXACT_BETWEENNESS_MAX_NODES:
+                centrality = nx.betweenness_centrality(G, k=max(5, math.isqrt(n)), seed=0)
+            else:
+                centrality = nx.betweenness_centrality(G)
             
             # Find hub airports
-            hub_airports = sorted(
-                centrality.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:5]
+            hub_airports = heapq.nlargest(
+                5,
+                ((airports[node], score) for node, score in centrality.items()),
+                key=itemgetter(1)
+            )
             
-            # Calculate route efficiency
-            path_lengths = dict(nx.all_pairs_shortest_path_length(G))
-            avg_path_length = sum(
-                length for paths in path_lengths.values() 
-                for length in paths.values()
-            ) / sum(len(paths) for paths in path_lengths.values())
+            # Calculate route efficiency over reachable pairs (including each airport to itself),
+            # streaming blocks of source rows so the full N x N distance matrix is never held
+            total = 0.0
+            count = 0
+            for start in range(0, n, _PATH_BLOCK_SIZE):
+                dist = csgraph.shortest_path(
+                    A, directed=True, unweighted=True,
+                    indices=np.arange(start, min(start + _PATH_BLOCK_SIZE, n))
+                )
+                reachable = np.isfinite(dist)
+                total += dist[reachable].sum()
+                count += int(reachable.sum())
+            avg_path_length = total / count
             
             network_analysis = {
                 "total_airports": G.number_of_nodes(),
                 "total_routes": G.number_of_edges(),
                 "hub_airports": [{"airport": airport, "score": round(score, 3)} 
                                for airport, score in hub_airports],
-                "avg_path_length": round(avg_path_length, 2),
+                "avg_path_length": round(float(avg_path_length), 2),
                 "network_density": round(nx.density(G), 3),
                 "strongly_connected": nx.is_strongly_connected(G),
                 "airline_coverage": self._calculate_airline_coverage(),
@@ -277,75 +461,118 @@ class RouteScraper:
             }
             
             logger.info("Network analysis completed")
+            self._cache["network"] = network_analysis
             return network_analysis
             
         except Exception as e:
             logger.error(f"Error analyzing route network: {str(e)}")
             return {}
     
-    def _calculate_airline_coverage(self) -> Dict[str, Any]:
-        """Calculate airline coverage metrics"""
-        airline_stats = {}
-        
-        for route in self.sample_route_data:
-            airline = route["airline"]
-            if airline not in airline_stats:
-                airline_stats[airline] = {
-                    "routes": 0,
-                    "airports": set(),
-                    "total_frequency": 0
-                }
-            
-            airline_stats[airline]["routes"] += 1
-            airline_stats[airline]["airports"].add(route["origin"])
-            airline_stats[airline]["airports"].add(route["destination"])
-            airline_stats[airline]["total_frequency"] += route["frequency"]
-        
-        # Convert to list format
-        coverage = []
-        for airline, stats in airline_stats.items():
-            coverage.append({
+    def _compute_all_aggregates(self) -> Dict[str, Any]:
+        """
+        Compute airline coverage, route distribution and seasonal patterns together.
+        
+        A single groupby over (airline, season) feeds both the per-airline and
+        per-season rollups, so the route rows are aggregated once.
+        """
+        if "aggregates" in self._cache:
+            return self._cache["aggregates"]
+        
+        np = load_numpy()
+        pd = load_pandas()
+        df = self._df
+        grouped = df.groupby(["airline", "peak_season"], sort=False, observed=True).agg(
+            routes=("frequency", "size"),
+            total_frequency=("frequency", "sum"),
+            demand=("demand_score", "sum"),
+            price=("avg_price", "sum")
+        )
+        
+        # Airline coverage; an airline covers every airport it flies from or to
+        by_airline = grouped.groupby(level="airline", sort=False, observed=True)[["routes", "total_frequency"]].sum()
+        airline_codes = df["airline"].cat.codes.to_numpy()
+        served = np.zeros((len(df["airline"].cat.categories), len(df["origin"].cat.categories)), dtype=bool)
+        served[airline_codes, df["origin"].cat.codes.to_numpy()] = True
+        served[airline_codes, df["destination"].cat.codes.to_numpy()] = True
+        airports = pd.Series(served.sum(axis=1), index=df["airline"].cat.categories)
+        
+        coverage = [
+            {
                 "airline": airline,
-                "routes": stats["routes"],
-                "airports": len(stats["airports"]),
-                "total_frequency": stats["total_frequency"],
-                "avg_frequency": round(stats["total_frequency"] / stats["routes"], 1)
-            })
+                "routes": routes,
+                "airports": airport_count,
+                "total_frequency": total_frequency,
+                "avg_frequency": round(total_frequency / routes, 1)
+            }
+            for airline, routes, total_frequency, airport_count in zip(
+                by_airline.index.tolist(), by_airline["routes"].tolist(),
+                by_airline["total_frequency"].tolist(), airports.reindex(by_airline.index).tolist()
+            )
+        ]
+        coverage.sort(key=lambda x: x["routes"], reverse=True)
         
-        return sorted(coverage, key=lambda x: x["routes"], reverse=True)
-    
-    def _calculate_route_distribution(self) -> Dict[str, Any]:
-        """Calculate route distribution by various metrics"""
+        # Seasonal patterns
+        by_season = grouped.groupby(level="peak_season", sort=False, observed=True).sum()
+        seasonal_data = {
+            season: {
+                "routes": routes,
+                "avg_demand": round(demand / routes, 2),
+                "avg_price": round(price / routes, 2),
+                "total_frequency": total_frequency,
+                "avg_frequency": round(total_frequency / routes, 1)
+            }
+            for season, routes, demand, price, total_frequency in zip(
+                by_season.index.tolist(), by_season["routes"].tolist(), by_season["demand"].tolist(),
+                by_season["price"].tolist(), by_season["total_frequency"].tolist()
+            )
+        }
         
-        # Distribution by frequency
-        frequencies = [route["frequency"] for route in self.sample_route_data]
+        # Route distribution by frequency, price and demand
+        low, medium, high = self._bucket_counts(df["frequency"].to_numpy(), (14, 28))
         freq_distribution = {
-            "low_frequency": len([f for f in frequencies if f < 14]),
-            "medium_frequency": len([f for f in frequencies if 14 <= f < 28]),
-            "high_frequency": len([f for f in frequencies if f >= 28])
+            "low_frequency": low,
+            "medium_frequency": medium,
+            "high_frequency": high
         }
-        
-        # Distribution by price
-        prices = [route["avg_price"] for route in self.sample_route_data]
+        budget, standard, premium = self._bucket_counts(df["avg_price"].to_numpy(), (300, 500))
         price_distribution = {
-            "budget": len([p for p in prices if p < 300]),
-            "standard": len([p for p in prices if 300 <= p < 500]),
-            "premium": len([p for p in prices if p >= 500])
+            "budget": budget,
+            "standard": standard,
+            "premium": premium
         }
-        
-        # Distribution by demand
-        demands = [route["demand_score"] for route in self.sample_route_data]
+        low, medium, high = self._bucket_counts(df["demand_score"].to_numpy(), (0.5, 0.8))
         demand_distribution = {
-            "low_demand": len([d for d in demands if d < 0.5]),
-            "medium_demand": len([d for d in demands if 0.5 <= d < 0.8]),
-            "high_demand": len([d for d in demands if d >= 0.8])
+            "low_demand": low,
+            "medium_demand": medium,
+            "high_demand": high
         }
         
-        return {
-            "frequency": freq_distribution,
-            "price": price_distribution,
-            "demand": demand_distribution
+        aggregates = {
+            "airline_coverage": coverage,
+            "route_distribution": {
+                "frequency": freq_distribution,
+                "price": price_distribution,
+                "demand": demand_distribution
+            },
+            "seasonal_patterns": seasonal_data
         }
+        self._cache["aggregates"] = aggregates
+        return aggregates
+    
+    def _calculate_airline_coverage(self) -> Dict[str, Any]:
+        """Calculate airline coverage metrics"""
+        return self._compute_all_aggregates()["airline_coverage"]
+    
+    def _calculate_route_distribution(self) -> Dict[str, Any]:
+        """Calculate route distribution by various metrics"""
+        return self._compute_all_aggregates()["route_distribution"]
+    
+    @staticmethod
+    def _bucket_counts(values: "np.ndarray", edges: tuple) -> List[int]:
+        """Count values in [-inf, e0), [e0, e1), [e1, inf)"""
+        np = load_numpy()
+        buckets = np.searchsorted(edges, values, side="right")
+        return np.bincount(buckets, minlength=len(edges) + 1).tolist()
     
     def get_seasonal_patterns(self) -> Dict[str, Any]:
         """
@@ -357,29 +584,7 @@ class RouteScraper:
         logger.info("Analyzing seasonal patterns")
         
         try:
-            seasonal_data = {}
-            
-            for route in self.sample_route_data:
-                season = route["peak_season"]
-                if season not in seasonal_data:
-                    seasonal_data[season] = {
-                        "routes": 0,
-                        "avg_demand": 0,
-                        "avg_price": 0,
-                        "total_frequency": 0
-                    }
-                
-                seasonal_data[season]["routes"] += 1
-                seasonal_data[season]["avg_demand"] += route["demand_score"]
-                seasonal_data[season]["avg_price"] += route["avg_price"]
-                seasonal_data[season]["total_frequency"] += route["frequency"]
-            
-            # Calculate averages
-            for season, data in seasonal_data.items():
-                data["avg_demand"] = round(data["avg_demand"] / data["routes"], 2)
-                data["avg_price"] = round(data["avg_price"] / data["routes"], 2)
-                data["avg_frequency"] = round(data["total_frequency"] / data["routes"], 1)
-            
+            seasonal_data = self._compute_all_aggregates()["seasonal_patterns"]
             logger.info("Seasonal analysis completed")
             return seasonal_data
             
@@ -387,6 +592,15 @@ class RouteScraper:
             logger.error(f"Error analyzing seasonal patterns: {str(e)}")
             return {}
     
+    def _assemble_payload(self) -> Dict[str, Any]:
+        """Build the combined route data payload"""
+        return {
+            "routes": self.sample_route_data,
+            "network_analysis": self.analyze_route_network(),
+            "seasonal_patterns": self.get_seasonal_patterns(),
+            "last_updated": datetime.now().isoformat()
+        }
+    
     def get_all_route_data(self) -> Dict[str, Any]:
         """
         Get all available route data and analysis.
@@ -396,9 +610,19 @@ class RouteScraper:
         """
         logger.info("Collecting all route data")
         
-        return {
-            "routes": self.sample_route_data,
-            "network_analysis": self.analyze_route_network(),
-            "seasonal_patterns": self.get_seasonal_patterns(),
-            "last_updated": datetime.now().isoformat()
-        } 
\ No newline at end of file
+        return self._assemble_payload()
+    
+    def get_all_route_data_bytes(self) -> bytes:
+        """
+        Get all available route data and analysis, serialized as JSON.
+        
+        Returns:
+            UTF-8 JSON bytes, ready to send as-is (e.g. in a Response with
+            media_type="application/json")
+        """
+        logger.info("Collecting all route data")
+        
+        return orjson.dumps(
+            self._assemble_payload(),
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
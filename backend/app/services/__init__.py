@@ -6,7 +6,5 @@ This module contains business logic services for the airline insights applicatio
 """
 
 from .openai_service import OpenAIService
-from .data_processor import DataProcessor
-from .insight_generator import InsightGenerator
 
-__all__ = ["OpenAIService", "DataProcessor", "InsightGenerator"] 
\ No newline at end of file
+__all__ = ["OpenAIService"] 
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Parallel Request Processor
+=========================
+
+This module dispatches batches of OpenAI requests concurrently while staying
+within the account's requests-per-minute and tokens-per-minute budgets.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, List, Sequence, Tuple
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# How long the dispatcher sleeps when it is waiting for capacity or in-flight requests
+_IDLE_SLEEP = 0.01
+
+@dataclass
+class _Job:
+    """A queued request and its retry state"""
+    index: int
+    factory: Callable[[], Awaitable[Any]]
+    tokens: int
+    attempts_left: int
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a failure is transient: rate limits, timeouts, connection errors and 5xx responses"""
+    if isinstance(error, (RateLimitError, APITimeoutError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+async def process_batch(requests: Sequence[Tuple[Callable[[], Awaitable[Any]], int]],
+                        rpm: float, tpm: float, max_attempts: int = 5) -> List[Any]:
+    """
+    Run a batch of requests concurrently within RPM/TPM budgets.
+
+    Request and token capacity refill continuously at rpm/60 and tpm/60 per
+    second; a request is dispatched as soon as both budgets cover it. A 429
+    halves the request rate for the rest of the batch and pauses dispatch with
+    exponential backoff before the request is retried. Timeouts, connection
+    errors and 5xx responses back off only the failed request; any other error
+    fails it immediately.
+
+    Args:
+        requests: (coroutine factory, estimated token cost) pairs
+        rpm: Requests per minute budget
+        tpm: Tokens per minute budget
+        max_attempts: Attempts per request before giving up
+
+    Returns:
+        Results in input order; a failed request holds its last exception
+    """
+    results: List[Any] = [None] * len(requests)
+    queue: Deque[_Job] = deque(
+        _Job(i, factory, tokens, max_attempts) for i, (factory, tokens) in enumerate(requests)
+    )
+
+    request_rate = rpm
+    available_requests = rpm
+    available_tokens = tpm
+    last_refill = time.monotonic()
+    pause_until = 0.0
+    in_flight = 0
+
+    async def run(job: _Job) -> None:
+        nonlocal in_flight, request_rate, pause_until
+        try:
+            results[job.index] = await job.factory()
+        except Exception as e:
+            job.attempts_left -= 1
+            attempt = max_attempts - job.attempts_left
+            if job.attempts_left <= 0 or not _is_retryable(e):
+                logger.error(f"Request {job.index} failed after {attempt} attempt(s): {str(e)}")
+                results[job.index] = e
+                return
+            backoff = min(2 ** attempt, 60)
+            if isinstance(e, RateLimitError):
+                # The whole account is over budget, so every request waits
+                request_rate = max(1.0, request_rate / 2)
+                logger.warning(f"Rate limited; slowing to {request_rate:.0f} requests/minute")
+                pause_until = max(pause_until, time.monotonic() + backoff)
+            else:
+                # Still counted as in flight while it waits, so the batch doesn't finish early
+                await asyncio.sleep(backoff)
+            queue.append(job)
+        finally:
+            in_flight -= 1
+
+    tasks = set()
+    while queue or in_flight:
+        now = time.monotonic()
+        elapsed = now - last_refill
+        last_refill = now
+        available_requests = min(request_rate, available_requests + request_rate * elapsed / 60)
+        available_tokens = min(tpm, available_tokens + tpm * elapsed / 60)
+
+        if queue and now >= pause_until:
+            job = queue[0]
+            # Jobs larger than the whole token budget still go out once the bucket is full
+            tokens_needed = min(job.tokens, tpm)
+            if available_requests >= 1 and available_tokens >= tokens_needed:
+                queue.popleft()
+                available_requests -= 1
+                available_tokens -= tokens_needed
+                in_flight += 1
+                task = asyncio.ensure_future(run(job))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                continue
+
+        await asyncio.sleep(_IDLE_SLEEP)
+
+    return results
@@ -0,0 +1,99 @@
+"""
+Semantic Cache
+=============
+
+This module contains an embedding-similarity cache that lets near-duplicate
+insight requests reuse an earlier completion.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, TYPE_CHECKING
+
+from ..lazy import load_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """
+    Cache keyed by embedding similarity instead of exact text.
+
+    Entries live in a preallocated float32 ring buffer of unit vectors, so a
+    lookup is one matrix-vector product; the best match at or above the
+    threshold wins.
+    """
+
+    def __init__(self, embed: Callable[[str], Awaitable[Sequence[float]]],
+                 threshold: float = 0.97, maxsize: int = 512):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            embed: Coroutine returning the embedding vector for a text
+            threshold: Minimum cosine similarity for a hit
+            maxsize: Maximum number of cached entries (oldest evicted first)
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.vecs: "Optional[np.ndarray]" = None
+        self.values: List[Any] = [None] * maxsize
+        self._size = 0
+        self._next = 0
+        # Vectors from recent lookups so a miss followed by store() embeds once
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    async def _vector(self, summary: str) -> "np.ndarray":
+        np = load_numpy()
+        vec = self._recent.get(summary)
+        if vec is None:
+            vec = np.asarray(await self.embed(summary), dtype=np.float32)
+            vec /= np.linalg.norm(vec) or 1.0
+            self._recent[summary] = vec
+            if len(self._recent) > 64:
+                self._recent.popitem(last=False)
+        return vec
+
+    async def lookup(self, summary: str) -> Optional[Any]:
+        """
+        Find a cached value for a semantically similar summary.
+
+        Args:
+            summary: Canonical summary text of the request
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        vec = await self._vector(summary)
+        if self._size == 0:
+            return None
+
+        similarities = self.vecs[:self._size] @ vec
+        best = int(similarities.argmax())
+        if similarities[best] >= self.threshold:
+            logger.info(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+            return self.values[best]
+        return None
+
+    async def store(self, summary: str, value: Any) -> None:
+        """
+        Cache a value under a summary.
+
+        Args:
+            summary: Canonical summary text of the request
+            value: Value to return for similar summaries
+        """
+        vec = await self._vector(summary)
+        self._recent.pop(summary, None)
+
+        if self.vecs is None:
+            self.vecs = load_numpy().empty((self.maxsize, len(vec)), dtype=vec.dtype)
+
+        # Overwrite the oldest slot once full
+        self.vecs[self._next] = vec
+        self.values[self._next] = value
+        self._next = (self._next + 1) % self.maxsize
+        self._size = min(self._size + 1, self.maxsize)
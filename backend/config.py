@@ -1,67 +1,81 @@
 """
 Configuration module for Airline Data Insights backend
 """
-import os
-from typing import List
+from typing import FrozenSet, Union
 from functools import lru_cache
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-class Settings:
-    """Application settings with environment variable support"""
+class Settings(BaseSettings):
+    """Application settings with environment variable support (parsed and validated once)"""
+    
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True, extra="ignore")
     
     # Application Configuration
     APP_NAME: str = "Airline Data Insights"
     APP_VERSION: str = "1.0.0"
-    DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
-    HOST: str = os.getenv("HOST", "localhost")
-    PORT: int = int(os.getenv("PORT", "8000"))
+    DEBUG: bool = False
+    HOST: str = "localhost"
+    PORT: int = 8000
     
     # OpenAI Configuration
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_API_KEY: str = ""
+    OPENAI_MAX_CONCURRENCY: int = 8
+    # Opt-in request coalescing: prompts queued within this window share one completion (0 disables)
+    OPENAI_BATCH_WINDOW_MS: int = 0
+    # Token budget per batch (the default model's context window): estimated prompt tokens plus
+    # every request's completion budget must fit, or the combined request is rejected outright
+    OPENAI_BATCH_MAX_TOKENS: int = 4096
+    # Row-based inputs smaller than this get the low-confidence mock instead of an OpenAI request
+    INSIGHTS_MIN_SAMPLE: int = 3
     
-    # CORS Configuration
-    CORS_ORIGINS: List[str] = os.getenv(
-        "CORS_ORIGINS", 
-        "http://localhost:3000,http://localhost:8080,http://127.0.0.1:5500"
-    ).split(",")
+    # CORS Configuration (comma-separated in the environment; a set for O(1) origin checks)
+    CORS_ORIGINS: Union[FrozenSet[str], str] = frozenset({
+        "http://localhost:3000", "http://localhost:8080", "http://127.0.0.1:5500"
+    })
     
     # Database Configuration
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./airline_data.db")
+    DATABASE_URL: str = "sqlite:///./airline_data.db"
     
     # Rate Limiting
-    RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
-    RATE_LIMIT_PERIOD: int = int(os.getenv("RATE_LIMIT_PERIOD", "60"))
+    RATE_LIMIT_REQUESTS: int = 100
+    RATE_LIMIT_PERIOD: int = 60
     
     # Logging Configuration
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
     
     # External API Configuration
-    SCRAPER_USER_AGENT: str = os.getenv(
-        "SCRAPER_USER_AGENT", 
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    )
-    REQUEST_TIMEOUT: int = int(os.getenv("REQUEST_TIMEOUT", "30"))
-    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "3"))
+    SCRAPER_USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    REQUEST_TIMEOUT: int = 30
+    MAX_RETRIES: int = 3
     
     # Cache Configuration
-    CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))
-    ENABLE_CACHE: bool = os.getenv("ENABLE_CACHE", "true").lower() == "true"
+    CACHE_TTL: int = 3600
+    ENABLE_CACHE: bool = True
+    # Opt-in near-duplicate reuse for summary-based insights (costs one embedding call per request)
+    ENABLE_SEMANTIC_CACHE: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.97
     
     # Security Configuration
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "your_secret_key_here")
-    ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    SECRET_KEY: str = "your_secret_key_here"
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
     # Sample Data Configuration
-    SAMPLE_DATA_SIZE: int = int(os.getenv("SAMPLE_DATA_SIZE", "100"))
+    SAMPLE_DATA_SIZE: int = 100
     
     # API Response Configuration
-    DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "20"))
-    MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    DEFAULT_PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    @field_validator("CORS_ORIGINS", mode="before")
+    @classmethod
+    def _split_cors_origins(cls, value):
+        """Accept a comma-separated origin list"""
+        if isinstance(value, str):
+            return frozenset(value.split(","))
+        return value
 
 
 @lru_cache()
@@ -78,12 +92,12 @@ ENVIRONMENT_CONFIGS = {
     "development": {
         "DEBUG": True,
         "LOG_LEVEL": "DEBUG",
-        "CORS_ORIGINS": ["http://localhost:3000", "http://localhost:8080", "http://127.0.0.1:5500"],
+        "CORS_ORIGINS": frozenset({"http://localhost:3000", "http://localhost:8080", "http://127.0.0.1:5500"}),
     },
     "production": {
         "DEBUG": False,
         "LOG_LEVEL": "INFO",
-        "CORS_ORIGINS": ["https://yourdomain.com"],
+        "CORS_ORIGINS": frozenset({"https://yourdomain.com"}),
     },
     "testing": {
         "DEBUG": True,
@@ -92,6 +106,7 @@ ENVIRONMENT_CONFIGS = {
     }
 }
 
+@lru_cache(maxsize=4)
 def get_environment_config(env: str = "development") -> dict:
     """Get environment-specific configuration"""
     return ENVIRONMENT_CONFIGS.get(env, ENVIRONMENT_CONFIGS["development"])
@@ -32,10 +32,19 @@ def main():
             "reload_includes": ["*.py"],
             "reload_excludes": ["*.pyc", "__pycache__"],
         })
+    else:
+        # Production: C event loop and HTTP parser (from uvicorn[standard]), one worker per core
+        uvicorn_config.update({
+            "loop": "uvloop",
+            "http": "httptools",
+            "workers": int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        })
     
     print(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     print(f"Environment: {'Development' if settings.DEBUG else 'Production'}")
     print(f"Server: http://{settings.HOST}:{settings.PORT}")
+    if "workers" in uvicorn_config:
+        print(f"Workers: {uvicorn_config['workers']}")
     print(f"API Documentation: http://{settings.HOST}:{settings.PORT}/docs")
     print(f"OpenAI API: {'Configured' if settings.OPENAI_API_KEY else 'Not configured (will use mock data)'}")
     
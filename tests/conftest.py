@@ -0,0 +1,267 @@
+"""
+Shared fixtures for the Airline Data Insights test suite
+"""
+import pytest
+import pytest_asyncio
+import asyncio
+import sys
+import time
+import json
+import orjson
+from pathlib import Path
+import httpx
+import requests
+from fastapi.testclient import TestClient
+
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from app.main import app
+
+# Canned bodies for outbound HTTP, built once
+_SCRAPER_BODY = json.dumps({
+    "flights": [{
+        "origin": "JFK",
+        "destination": "LAX",
+        "date": "2024-01-15",
+        "price": 450,
+        "airline": "American Airlines",
+        "departure_time": "08:00",
+        "arrival_time": "11:30",
+        "duration": "5h 30m"
+    }],
+    "routes": [{"route": "JFK-LAX", "flights": 45, "avg_price": 450, "popularity": 85}],
+    "trends": [{"date": "2024-01-15", "avg_price": 450, "route": "JFK-LAX"}]
+}).encode()
+
+# Canned responses by URL path suffix; anything unmatched gets the scraper payload
+_HTTP_ROUTES = {
+    "/chat/completions": json.dumps({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-3.5-turbo",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": json.dumps({"insight_type": "test", "summary": "ok"})}
+        }]
+    }).encode(),
+    "/embeddings": json.dumps({
+        "object": "list",
+        "model": "text-embedding-3-small",
+        "data": [{"object": "embedding", "index": 0, "embedding": [1.0, 0.0, 0.0]}]
+    }).encode()
+}
+_JSON_CONTENT_TYPE = {"Content-Type": "application/json"}
+
+
+def _canned_body(path: str) -> bytes:
+    """Look up the canned body for a request path"""
+    for suffix, body in _HTTP_ROUTES.items():
+        if path.endswith(suffix):
+            return body
+    return _SCRAPER_BODY
+
+
+def _fake_requests_send(adapter, request, **kwargs):
+    """Answer a requests call from the route table"""
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update(_JSON_CONTENT_TYPE)
+    response._content = _canned_body(requests.utils.urlparse(request.url).path)
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def _fake_httpx_response(request: httpx.Request) -> httpx.Response:
+    """Answer an httpx call from the route table"""
+    return httpx.Response(200, content=_canned_body(request.url.path), headers=_JSON_CONTENT_TYPE, request=request)
+
+
+def jload(response):
+    """Decode a JSON response body with orjson"""
+    return orjson.loads(response.content)
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the code under test sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+        # Still yield so other tasks get to run
+        await asyncio.sleep(0)
+
+
+class _ModuleOverlay:
+    """Stand-in for a module that overrides some attributes and forwards the rest"""
+
+    def __init__(self, module, **overrides):
+        self._module = module
+        self.__dict__.update(overrides)
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_network():
+    """Keep the whole session off the network: scrapers and OpenAI get canned responses"""
+    async def fake_async_send(transport, request):
+        return _fake_httpx_response(request)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("requests.adapters.HTTPAdapter.send", _fake_requests_send)
+        mp.setattr("httpx.HTTPTransport.handle_request", lambda transport, request: _fake_httpx_response(request))
+        mp.setattr("httpx.AsyncHTTPTransport.handle_async_request", fake_async_send)
+        yield
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client fixture, with a single app startup/shutdown per session"""
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def _no_scraper_sleep(request, monkeypatch):
+    """Skip the scrapers' politeness delays unless the test is marked real_rate_limits"""
+    if request.node.get_closest_marker("real_rate_limits") is not None:
+        return
+    from app.scrapers.flight_scraper import _HostRateLimiter
+    from app.scrapers.route_scraper import RateLimiter
+
+    async def acquire(limiter):
+        return None
+
+    monkeypatch.setattr(_HostRateLimiter, "wait", lambda limiter, url: None)
+    monkeypatch.setattr(RateLimiter, "acquire", acquire)
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Swap one FakeClock into the given modules' time and asyncio references; returns the clock"""
+    clock = FakeClock()
+
+    def install(*modules):
+        for module in modules:
+            if getattr(module, "time", None) is time:
+                monkeypatch.setattr(module, "time", _ModuleOverlay(time, monotonic=clock.monotonic, sleep=clock.sleep))
+            if getattr(module, "asyncio", None) is asyncio:
+                monkeypatch.setattr(module, "asyncio", _ModuleOverlay(asyncio, sleep=clock.async_sleep))
+        return clock
+
+    return install
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for the session so session-scoped async fixtures can share it (uvloop when installed)"""
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def aclient():
+    """Async test client calling the app in-process over ASGI"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def flight_scraper():
+    """FlightScraper shared across tests"""
+    from app.scrapers.flight_scraper import FlightScraper
+    return FlightScraper()
+
+
+@pytest.fixture(scope="session")
+def route_scraper():
+    """RouteScraper shared across tests"""
+    from app.scrapers.route_scraper import RouteScraper
+    return RouteScraper()
+
+
+@pytest.fixture(scope="session")
+def openai_service():
+    """OpenAIService shared across tests, built without an API key so it serves simulated insights"""
+    from app.services.openai_service import OpenAIService
+    with pytest.MonkeyPatch.context() as mp:
+        mp.delenv("OPENAI_API_KEY", raising=False)
+        return OpenAIService()
+
+
+@pytest.fixture(scope="session")
+def flight_scraper_results(flight_scraper):
+    """Flight scraper outputs, computed once per session"""
+    # Sample flights are random, so search a route that is known to have some
+    first = flight_scraper.sample_flight_data[0]
+    return {
+        "flights": flight_scraper.scrape_flights(first["origin"], first["destination"]),
+        "routes": flight_scraper.scrape_popular_routes(),
+        "trends": flight_scraper.scrape_price_trends()
+    }
+
+
+@pytest.fixture(scope="session")
+def route_scraper_results(route_scraper):
+    """Route scraper outputs, computed once per session"""
+    return {
+        "network": route_scraper.analyze_route_network()
+    }
+
+
+@pytest.fixture(scope="session")
+def openai_insights(openai_service, flight_scraper, route_scraper, event_loop):
+    """Insights generated from the sample scraper data, computed once per session"""
+    return {
+        "flight": event_loop.run_until_complete(
+            openai_service.generate_flight_insights(flight_scraper.sample_flight_data)
+        ),
+        "route": event_loop.run_until_complete(
+            openai_service.generate_route_analysis(route_scraper.sample_route_data)
+        )
+    }
+
+
+@pytest.fixture(scope="session")
+def flights_payload(flight_scraper_results):
+    """Flights scraped for one sample route"""
+    return flight_scraper_results["flights"]
+
+
+@pytest.fixture(scope="session")
+def popular_routes_payload(flight_scraper_results):
+    """Scraped popular routes"""
+    return flight_scraper_results["routes"]
+
+
+@pytest.fixture(scope="session")
+def price_trends_payload(flight_scraper_results):
+    """Scraped price trends"""
+    return flight_scraper_results["trends"]
+
+
+@pytest.fixture(scope="session")
+def hubs_payload(route_scraper_results):
+    """Hub airports identified by the route network analysis"""
+    return route_scraper_results["network"]["hub_airports"]
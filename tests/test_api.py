@@ -3,414 +3,361 @@ Comprehensive test suite for Airline Data Insights API
 """
 import pytest
 import asyncio
-from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
-import sys
-import os
-from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+import orjson
+from urllib3 import PoolManager
 
-# Add the backend directory to Python path
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+from conftest import jload
 
-from app.main import app
-from app.scrapers.flight_scraper import FlightScraper
-from app.scrapers.route_scraper import RouteScraper
-from app.services.openai_service import OpenAIService
+# Fields every scraped or generated record must carry
+_FLIGHT_FIELDS = frozenset({
+    "flight_id", "airline", "origin", "destination", "departure_time", "arrival_time",
+    "duration", "price", "currency", "class_type", "stops"
+})
+_POPULAR_ROUTE_FIELDS = frozenset({"route", "passengers", "avg_price", "growth"})
+_PRICE_TREND_FIELDS = frozenset({"average_price", "min_price", "max_price", "trend_direction", "confidence"})
+_NETWORK_FIELDS = frozenset({
+    "total_airports", "total_routes", "hub_airports", "avg_path_length", "network_density",
+    "airline_coverage", "route_distribution"
+})
+_HUB_FIELDS = frozenset({"airport", "score"})
+_FLIGHT_INSIGHT_FIELDS = frozenset({"insight_type", "key_trends", "recommendations", "generated_at", "data_points"})
+_ROUTE_ANALYSIS_FIELDS = frozenset({"insight_type", "hub_analysis", "recommendations", "generated_at", "routes_analyzed"})
+
+# Request bodies, encoded once
+_JSON_HEADERS = {"content-type": "application/json"}
+_SEARCH_JFK_LAX = orjson.dumps({
+    "origin": "JFK",
+    "destination": "LAX",
+    "departure_date": "2024-07-15"
+})
+_SEARCH_WITH_FILTERS = orjson.dumps({
+    "origin": "jfk",  # Codes and class are matched case-insensitively
+    "destination": "lax",
+    "departure_date": "2024-07-15",
+    "passengers": 2,
+    "class_type": "ECONOMY"
+})
+_SEARCH_UNKNOWN_ROUTE = orjson.dumps({
+    "origin": "XXX",
+    "destination": "LAX"
+})
+_SEARCH_BAD_PASSENGERS = orjson.dumps({
+    "origin": "JFK",
+    "destination": "LAX",
+    "passengers": "many"  # Not an integer
+})
+_SEARCH_MALFORMED = b'{"origin": "JFK",'
 
-# Initialize test client
-client = TestClient(app)
 
 class TestAPIEndpoints:
     """Test all API endpoints"""
-    
-    def test_root_endpoint(self):
-        """Test root endpoint"""
-        response = client.get("/")
-        assert response.status_code == 200
-        data = response.json()
-        assert "message" in data
-        assert "app_name" in data
-        assert "version" in data
-        assert data["app_name"] == "Airline Data Insights"
-    
-    def test_health_endpoint(self):
-        """Test health check endpoint"""
-        response = client.get("/health")
+
+    @pytest.mark.parametrize("path,keys,values", [
+        ("/", {"message", "version", "status", "timestamp"}, {"status": "active"}),
+        ("/health", {"status", "timestamp", "service", "openai_max_concurrency"}, {"status": "healthy"}),
+        ("/api/routes/popular", {"popular_routes", "count", "timestamp"}, {"count": 5}),
+        ("/api/insights/trends", {"trends", "generated_at"}, {}),
+        ("/api/insights/pricing", {"pricing_analysis", "generated_at"}, {}),
+        ("/api/scrape/status", {"status", "message", "progress", "last_updated"}, {"status": "idle"}),
+    ])
+    @pytest.mark.asyncio
+    async def test_get_endpoint_shape(self, aclient, path, keys, values):
+        """Test GET endpoints return the expected keys and values"""
+        response = await aclient.get(path)
         assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "healthy"
-        assert "timestamp" in data
-        assert "uptime" in data
-    
-    def test_flight_search_endpoint(self):
+        data = jload(response)
+        assert keys <= data.keys()
+        for key, value in values.items():
+            assert data[key] == value
+
+    @pytest.mark.asyncio
+    async def test_flight_search_endpoint(self, aclient):
         """Test flight search endpoint"""
-        search_data = {
-            "origin": "JFK",
-            "destination": "LAX",
-            "date": "2024-01-15"
-        }
-        response = client.post("/flights/search", json=search_data)
+        response = await aclient.post("/api/flights/search", content=_SEARCH_JFK_LAX, headers=_JSON_HEADERS)
         assert response.status_code == 200
-        data = response.json()
-        assert "flights" in data
-        assert "total" in data
+        data = jload(response)
+        assert {"flights", "count", "search_criteria", "timestamp"} <= data.keys()
         assert isinstance(data["flights"], list)
-    
-    def test_flight_search_with_filters(self):
+        assert data["count"] == len(data["flights"]) > 0
+        assert data["search_criteria"]["origin"] == "JFK"
+
+    @pytest.mark.asyncio
+    async def test_flight_search_with_filters(self, aclient):
         """Test flight search with filters"""
-        search_data = {
-            "origin": "JFK",
-            "destination": "LAX",
-            "date": "2024-01-15",
-            "min_price": 200,
-            "max_price": 800,
-            "airline": "American Airlines"
-        }
-        response = client.post("/flights/search", json=search_data)
+        response = await aclient.post("/api/flights/search", content=_SEARCH_WITH_FILTERS, headers=_JSON_HEADERS)
         assert response.status_code == 200
-        data = response.json()
-        assert "flights" in data
-        
+        data = jload(response)
+        assert len(data["flights"]) > 0
+
         # Verify filtering works
         for flight in data["flights"]:
-            assert 200 <= flight["price"] <= 800
-            assert flight["airline"] == "American Airlines"
-    
-    def test_popular_routes_endpoint(self):
-        """Test popular routes endpoint"""
-        response = client.get("/routes/popular")
+            assert flight["origin"] == "JFK"
+            assert flight["destination"] == "LAX"
+            assert flight["class_type"] == "economy"
+
+    @pytest.mark.parametrize("path", ["/api/scrape/trigger", "/api/insights/generate"])
+    @pytest.mark.asyncio
+    async def test_background_trigger_endpoint(self, aclient, path):
+        """Test endpoints that start background work"""
+        response = await aclient.post(path)
         assert response.status_code == 200
-        data = response.json()
-        assert "routes" in data
-        assert isinstance(data["routes"], list)
-        
-        # Verify route structure
-        if data["routes"]:
-            route = data["routes"][0]
-            assert "route" in route
-            assert "flights" in route
-            assert "avg_price" in route
-            assert "popularity" in route
-    
-    def test_pricing_trends_endpoint(self):
-        """Test pricing trends endpoint"""
-        response = client.get("/trends/pricing")
+        data = jload(response)
+        assert {"status", "message", "timestamp"} <= data.keys()
+        assert data["status"] == "started"
+
+
+class TestFlightSearchIndex:
+    """Test the index-based filtering behind flight search"""
+
+    @pytest.mark.parametrize("criteria,expected", [
+        ({}, 3),
+        ({"origin": "jfk"}, 3),
+        ({"destination": "LAX"}, 3),
+        ({"class_type": "Economy"}, 3),
+        ({"class_type": "business"}, 0),
+        ({"origin": "LAX", "destination": "JFK"}, 0),
+    ], ids=["no-filters", "origin", "destination", "class", "unknown-class", "reversed-route"])
+    def test_filter_combinations(self, client, criteria, expected):
+        """Test each filter alone and intersected with the others"""
+        response = client.post("/api/flights/search", content=orjson.dumps(criteria), headers=_JSON_HEADERS)
         assert response.status_code == 200
-        data = response.json()
-        assert "trends" in data
-        assert isinstance(data["trends"], list)
-        
-        # Verify trend structure
-        if data["trends"]:
-            trend = data["trends"][0]
-            assert "date" in trend
-            assert "avg_price" in trend
-    
-    def test_pricing_analysis_endpoint(self):
-        """Test pricing analysis endpoint"""
-        response = client.get("/analysis/pricing")
+        data = jload(response)
+        assert data["count"] == len(data["flights"]) == expected
+
+    def test_results_keep_source_order(self, client):
+        """Test intersected indices come back in sample order"""
+        from app.main import sample_flights
+
+        response = client.post("/api/flights/search", content=_SEARCH_WITH_FILTERS, headers=_JSON_HEADERS)
+        ids = [flight["flight_id"] for flight in jload(response)["flights"]]
+        assert ids == [flight["flight_id"] for flight in sample_flights]
+
+
+class TestCORS:
+    """Test the CORS middleware"""
+
+    @staticmethod
+    def _allowed_origin():
+        from config import settings
+        return sorted(origin for origin in settings.CORS_ORIGINS if origin != "*")[0]
+
+    def test_preflight_allowed_origin(self, client):
+        """Test a preflight from an allowed origin is answered directly"""
+        origin = self._allowed_origin()
+        response = client.options("/api/flights/search", headers={
+            "Origin": origin,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type"
+        })
+        assert response.status_code == 204
+        assert response.headers["access-control-allow-origin"] == origin
+        assert response.headers["access-control-allow-credentials"] == "true"
+        assert response.headers["access-control-allow-headers"] == "content-type"
+        assert "POST" in response.headers["access-control-allow-methods"]
+        assert response.headers["vary"] == "Origin"
+
+    def test_preflight_disallowed_origin(self, client):
+        """Test a preflight from an unknown origin is rejected"""
+        response = client.options("/api/flights/search", headers={
+            "Origin": "https://evil.example",
+            "Access-Control-Request-Method": "POST"
+        })
+        assert response.status_code == 400
+        assert "access-control-allow-origin" not in response.headers
+
+    def test_simple_request_echoes_origin(self, client):
+        """Test an allowed origin is echoed back rather than a wildcard"""
+        origin = self._allowed_origin()
+        response = client.get("/health", headers={"Origin": origin})
         assert response.status_code == 200
-        data = response.json()
-        assert "analysis" in data
-        assert "summary" in data
-        assert "recommendations" in data
-    
-    def test_scraping_status_endpoint(self):
-        """Test scraping status endpoint"""
-        response = client.get("/scraping/status")
+        assert response.headers["access-control-allow-origin"] == origin
+        assert response.headers["vary"] == "Origin"
+
+    @pytest.mark.parametrize("headers", [{"Origin": "https://evil.example"}, {}], ids=["disallowed", "no-origin"])
+    def test_simple_request_without_cors_headers(self, client, headers):
+        """Test disallowed and same-origin requests get no CORS headers"""
+        response = client.get("/health", headers=headers)
         assert response.status_code == 200
-        data = response.json()
-        assert "status" in data
-        assert "last_updated" in data
-        assert "total_flights" in data
-    
-    def test_scraping_trigger_endpoint(self):
-        """Test scraping trigger endpoint"""
-        response = client.post("/scraping/trigger")
+        assert "access-control-allow-origin" not in response.headers
+
+
+class TestInsightInputs:
+    """Test insight endpoints read only the flight records they use"""
+
+    @pytest.fixture
+    def no_aggregates(self, monkeypatch):
+        from app.scrapers.flight_scraper import FlightScraper
+        monkeypatch.setattr(FlightScraper, "get_all_data", Mock(side_effect=AssertionError("aggregates built")))
+
+    def test_generate_skips_aggregates(self, client, no_aggregates, caplog):
+        """Test background insight generation does not build routes, trends or airline data"""
+        response = client.post("/api/insights/generate")
         assert response.status_code == 200
-        data = response.json()
-        assert "status" in data
-        assert "message" in data
-    
-    def test_insights_generation_endpoint(self):
-        """Test insights generation endpoint"""
-        response = client.get("/insights/generate")
+        assert "Error in AI insights generation" not in caplog.text
+
+    def test_stream_skips_aggregates(self, client, no_aggregates):
+        """Test the insight stream does not build routes, trends or airline data"""
+        response = client.get("/api/insights/stream")
         assert response.status_code == 200
-        data = response.json()
-        assert "insights" in data
-        assert isinstance(data["insights"], list)
-        
-        # Verify insight structure
-        if data["insights"]:
-            insight = data["insights"][0]
-            assert "title" in insight
-            assert "description" in insight
-    
-    def test_invalid_flight_search(self):
-        """Test invalid flight search request"""
-        search_data = {
-            "origin": "",  # Empty origin
-            "destination": "LAX",
-            "date": "2024-01-15"
-        }
-        response = client.post("/flights/search", json=search_data)
-        assert response.status_code == 422  # Validation error
-    
-    def test_invalid_date_format(self):
-        """Test invalid date format in flight search"""
-        search_data = {
-            "origin": "JFK",
-            "destination": "LAX",
-            "date": "invalid-date"
-        }
-        response = client.post("/flights/search", json=search_data)
-        assert response.status_code == 422  # Validation error
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.content.startswith(b'data: {"insights":')
 
 
 class TestFlightScraper:
     """Test FlightScraper functionality"""
-    
-    def test_scraper_initialization(self):
+
+    def test_scraper_initialization(self, flight_scraper):
         """Test scraper initialization"""
-        scraper = FlightScraper()
-        assert scraper.base_url == "https://example-airline-api.com"
-        assert scraper.headers is not None
+        scraper = flight_scraper
+        assert scraper.delay > 0
         assert scraper.session is not None
-    
-    def test_scrape_flights(self):
-        """Test flight scraping"""
-        scraper = FlightScraper()
-        flights = scraper.scrape_flights("JFK", "LAX", "2024-01-15")
-        
-        assert isinstance(flights, list)
-        assert len(flights) > 0
-        
-        # Verify flight structure
-        flight = flights[0]
-        required_fields = ["origin", "destination", "date", "price", "airline", "departure_time", "arrival_time", "duration"]
-        for field in required_fields:
-            assert field in flight
-    
-    def test_scrape_popular_routes(self):
-        """Test popular routes scraping"""
-        scraper = FlightScraper()
-        routes = scraper.scrape_popular_routes()
-        
-        assert isinstance(routes, list)
-        assert len(routes) > 0
-        
-        # Verify route structure
-        route = routes[0]
-        required_fields = ["route", "flights", "avg_price", "popularity"]
-        for field in required_fields:
-            assert field in route
-    
-    def test_scrape_price_trends(self):
-        """Test price trends scraping"""
-        scraper = FlightScraper()
-        trends = scraper.scrape_price_trends()
-        
-        assert isinstance(trends, list)
-        assert len(trends) > 0
-        
-        # Verify trend structure
-        trend = trends[0]
-        required_fields = ["date", "avg_price", "route"]
-        for field in required_fields:
-            assert field in trend
+        assert scraper.session.headers["User-Agent"]
+
+        # Requests go through a pooled keep-alive adapter
+        adapter = scraper.session.get_adapter("https://")
+        assert isinstance(adapter.poolmanager, PoolManager)
+        assert adapter._pool_maxsize >= 10
+
+    def test_route_index_matches_scan(self, flight_scraper):
+        """Test indexed route lookups agree with a scan of the sample flights"""
+        from app.scrapers.flight_scraper import _sample_route_index
+
+        code_to_id, _ = _sample_route_index()
+        assert len(set(code_to_id.values())) == len(code_to_id)
+        for origin, destination in {(f["origin"], f["destination"]) for f in flight_scraper.sample_flight_data}:
+            expected = [
+                f for f in flight_scraper.sample_flight_data
+                if f["origin"] == origin and f["destination"] == destination
+            ]
+            assert flight_scraper.scrape_flights_raw(origin.lower(), destination) == expected
+
+    def test_flight_fields(self, flights_payload):
+        """Test scraped flights have the required fields"""
+        assert isinstance(flights_payload, list)
+        assert len(flights_payload) > 0
+        assert _FLIGHT_FIELDS <= set(flights_payload[0].__slots__)
+
+    def test_popular_route_fields(self, popular_routes_payload):
+        """Test scraped popular routes have the required fields"""
+        assert isinstance(popular_routes_payload, list)
+        assert len(popular_routes_payload) > 0
+        assert _POPULAR_ROUTE_FIELDS <= popular_routes_payload[0].keys()
+
+    def test_price_trend_fields(self, price_trends_payload):
+        """Test scraped price trends have the required fields"""
+        assert isinstance(price_trends_payload, dict)
+        assert _PRICE_TREND_FIELDS <= price_trends_payload.keys()
+        assert price_trends_payload["min_price"] <= price_trends_payload["average_price"] <= price_trends_payload["max_price"]
 
 
 class TestRouteScraper:
     """Test RouteScraper functionality"""
-    
-    def test_route_scraper_initialization(self):
+
+    def test_route_scraper_initialization(self, route_scraper):
         """Test route scraper initialization"""
-        scraper = RouteScraper()
-        assert scraper.graph is not None
-        assert scraper.airports is not None
-    
-    def test_analyze_route_network(self):
-        """Test route network analysis"""
-        scraper = RouteScraper()
-        analysis = scraper.analyze_route_network()
-        
+        scraper = route_scraper
+        assert scraper.session is not None
+        assert len(scraper.sample_route_data) > 0
+
+    def test_route_network_fields(self, route_scraper_results):
+        """Test route network analysis has the required fields"""
+        analysis = route_scraper_results["network"]
         assert isinstance(analysis, dict)
-        assert "hub_airports" in analysis
-        assert "route_efficiency" in analysis
-        assert "network_density" in analysis
-    
-    def test_get_hub_airports(self):
-        """Test hub airport identification"""
-        scraper = RouteScraper()
-        hubs = scraper.get_hub_airports()
-        
-        assert isinstance(hubs, list)
-        assert len(hubs) > 0
-        
-        # Verify hub structure
-        hub = hubs[0]
-        assert "airport" in hub
-        assert "centrality" in hub
-        assert "connections" in hub
+        assert _NETWORK_FIELDS <= analysis.keys()
+
+    def test_hub_fields(self, hubs_payload):
+        """Test identified hub airports have the required fields"""
+        assert isinstance(hubs_payload, list)
+        assert len(hubs_payload) > 0
+        assert _HUB_FIELDS <= hubs_payload[0].keys()
 
 
 class TestOpenAIService:
     """Test OpenAIService functionality"""
-    
-    def test_openai_service_initialization(self):
-        """Test OpenAI service initialization"""
-        service = OpenAIService()
-        assert service.client is not None
-    
-    def test_generate_flight_insights(self):
-        """Test flight insights generation"""
-        service = OpenAIService()
-        sample_flights = [
-            {
-                "origin": "JFK",
-                "destination": "LAX",
-                "price": 450,
-                "airline": "American Airlines",
-                "date": "2024-01-15"
-            }
-        ]
-        
-        insights = service.generate_flight_insights(sample_flights)
-        
-        assert isinstance(insights, list)
-        assert len(insights) > 0
-        
-        # Verify insight structure
-        insight = insights[0]
-        assert "title" in insight
-        assert "description" in insight
-    
-    def test_generate_route_analysis(self):
-        """Test route analysis generation"""
-        service = OpenAIService()
-        sample_routes = [
-            {
-                "route": "JFK-LAX",
-                "flights": 45,
-                "avg_price": 450,
-                "popularity": 85
-            }
-        ]
-        
-        analysis = service.generate_route_analysis(sample_routes)
-        
+
+    def test_openai_service_initialization(self, openai_service):
+        """Test OpenAI service initialization without an API key"""
+        service = openai_service
+        assert service.use_openai is False
+        assert service.client is None
+
+    def test_flight_insight_fields(self, openai_insights, flight_scraper):
+        """Test generated flight insights have the required fields"""
+        insights = openai_insights["flight"]
+        assert isinstance(insights, dict)
+        assert _FLIGHT_INSIGHT_FIELDS <= insights.keys()
+        assert insights["data_points"] == len(flight_scraper.sample_flight_data)
+
+    def test_route_analysis_fields(self, openai_insights):
+        """Test generated route analysis has the required fields"""
+        analysis = openai_insights["route"]
         assert isinstance(analysis, dict)
-        assert "summary" in analysis
-        assert "recommendations" in analysis
-    
-    @patch('app.services.openai_service.OpenAI')
-    def test_openai_api_error_handling(self, mock_openai):
+        assert _ROUTE_ANALYSIS_FIELDS <= analysis.keys()
+
+    @pytest.mark.asyncio
+    async def test_openai_api_error_handling(self, flight_scraper):
         """Test OpenAI API error handling"""
-        # Mock OpenAI client to raise an exception
-        mock_client = Mock()
-        mock_client.chat.completions.create.side_effect = Exception("API Error")
-        mock_openai.return_value = mock_client
-        
-        service = OpenAIService()
-        service.client = mock_client
-        
+        from app.services.openai_service import OpenAIService
+
+        # A fresh keyed service whose client always raises
+        service = OpenAIService(api_key="test-key")
+        await service.client.close()
+        service.client = Mock()
+        service.client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+
         # Should fall back to mock data
-        insights = service.generate_flight_insights([])
-        assert isinstance(insights, list)
-        assert len(insights) > 0
+        insights = await service.generate_flight_insights(flight_scraper.sample_flight_data)
+        service.client.chat.completions.create.assert_awaited()
+        assert isinstance(insights, dict)
+        assert insights["insight_type"] == "flight_insights"
+        assert _FLIGHT_INSIGHT_FIELDS <= insights.keys()
 
 
 class TestDataValidation:
     """Test data validation and error handling"""
-    
-    def test_flight_data_validation(self):
-        """Test flight data validation"""
-        # Test with valid data
-        valid_flight = {
-            "origin": "JFK",
-            "destination": "LAX",
-            "date": "2024-01-15",
-            "price": 450,
-            "airline": "American Airlines",
-            "departure_time": "08:00",
-            "arrival_time": "11:30",
-            "duration": "5h 30m"
-        }
-        
-        # This should not raise any validation errors
-        response = client.post("/flights/search", json={
-            "origin": "JFK",
-            "destination": "LAX",
-            "date": "2024-01-15"
-        })
-        assert response.status_code == 200
-    
-    def test_price_range_validation(self):
-        """Test price range validation"""
-        search_data = {
-            "origin": "JFK",
-            "destination": "LAX",
-            "date": "2024-01-15",
-            "min_price": 1000,
-            "max_price": 500  # max_price < min_price
-        }
-        
-        response = client.post("/flights/search", json=search_data)
-        # Should handle this gracefully and return empty results
+
+    def test_flight_data_validation(self, client):
+        """Test search results validate against the FlightData model"""
+        from app.main import FlightData
+
+        response = client.post("/api/flights/search", content=_SEARCH_JFK_LAX, headers=_JSON_HEADERS)
         assert response.status_code == 200
-        data = response.json()
-        assert len(data["flights"]) == 0
+        for flight in jload(response)["flights"]:
+            FlightData.model_validate(flight)
+
+    @pytest.mark.parametrize("body,expected", [
+        (_SEARCH_MALFORMED, 422),
+        (_SEARCH_BAD_PASSENGERS, 422),
+        # A route with no flights is handled gracefully with empty results
+        (_SEARCH_UNKNOWN_ROUTE, 200),
+    ], ids=["malformed-json", "bad-passengers", "unknown-route"])
+    def test_search_validation(self, client, body, expected):
+        """Test flight search request validation"""
+        response = client.post("/api/flights/search", content=body, headers=_JSON_HEADERS)
+        assert response.status_code == expected
+        if expected == 200:
+            assert len(jload(response)["flights"]) == 0
 
 
 class TestIntegration:
     """Integration tests for the entire system"""
-    
-    def test_full_flight_search_flow(self):
-        """Test complete flight search flow"""
-        # 1. Search for flights
-        search_data = {
-            "origin": "JFK",
-            "destination": "LAX",
-            "date": "2024-01-15"
-        }
-        
-        response = client.post("/flights/search", json=search_data)
-        assert response.status_code == 200
-        
-        # 2. Get popular routes
-        response = client.get("/routes/popular")
-        assert response.status_code == 200
-        
-        # 3. Get pricing trends
-        response = client.get("/trends/pricing")
-        assert response.status_code == 200
-        
-        # 4. Generate insights
-        response = client.get("/insights/generate")
-        assert response.status_code == 200
-    
-    def test_scraping_and_analysis_flow(self):
-        """Test scraping and analysis flow"""
-        # 1. Trigger scraping
-        response = client.post("/scraping/trigger")
-        assert response.status_code == 200
-        
-        # 2. Check scraping status
-        response = client.get("/scraping/status")
-        assert response.status_code == 200
-        
-        # 3. Get pricing analysis
-        response = client.get("/analysis/pricing")
-        assert response.status_code == 200
-
 
-# Pytest configuration
-@pytest.fixture
-def client():
-    """Test client fixture"""
-    return TestClient(app)
+    @pytest.mark.asyncio
+    async def test_smoke(self, aclient):
+        """Hit every endpoint in one concurrent batch (response shapes are covered above)"""
+        responses = await asyncio.gather(
+            aclient.post("/api/flights/search", content=_SEARCH_JFK_LAX, headers=_JSON_HEADERS),
+            aclient.get("/api/routes/popular"),
+            aclient.get("/api/insights/trends"),
+            aclient.get("/api/insights/pricing"),
+            aclient.post("/api/insights/generate"),
+            aclient.post("/api/scrape/trigger"),
+            aclient.get("/api/scrape/status")
+        )
+        assert all(response.status_code == 200 for response in responses)
 
 
 if __name__ == "__main__":
     # Run tests
-    pytest.main([__file__, "-v"]) 
\ No newline at end of file
+    pytest.main([__file__, "-v"])
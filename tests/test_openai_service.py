@@ -0,0 +1,200 @@
+"""
+Tests for OpenAIService request coalescing and batching
+"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+import pytest_asyncio
+
+from app.services import openai_service as openai_service_module
+from app.services.openai_service import OpenAIService
+
+_SYSTEM = "You are an airline analyst."
+
+
+@pytest_asyncio.fixture
+async def keyed_service():
+    """OpenAIService with an API key whose client is a stub, closed after the test"""
+    service = OpenAIService(api_key="test-key")
+    await service.client.close()
+    service.client = Mock()
+    service.client.close = AsyncMock()
+    yield service
+    await service.aclose()
+
+
+def _slow(result, calls):
+    """_create/_complete stand-in that yields to the loop before answering"""
+    async def create(system_prompt, prompt, temperature, max_tokens):
+        calls.append((system_prompt, prompt, temperature, max_tokens))
+        await asyncio.sleep(0.01)
+        return result(prompt) if callable(result) else result
+    return create
+
+
+class TestChatCoalescing:
+    """Test _chat caching and duplicate suppression"""
+
+    @pytest.fixture(autouse=True)
+    def _cache_enabled(self, monkeypatch):
+        monkeypatch.setattr(openai_service_module, "ENABLE_CACHE", True)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_share_one_request(self, keyed_service):
+        """Test identical concurrent calls send a single completion"""
+        calls = []
+        keyed_service._complete = _slow("answer", calls)
+
+        results = await asyncio.gather(*(keyed_service._chat(_SYSTEM, "prompt", 0.7, 100) for _ in range(5)))
+        assert results == ["answer"] * 5
+        assert len(calls) == 1
+        # Per-key locks are dropped once nobody holds them
+        assert keyed_service._locks == {}
+
+    @pytest.mark.asyncio
+    async def test_repeat_call_is_cached(self, keyed_service):
+        """Test a later identical call is answered from the cache"""
+        calls = []
+        keyed_service._complete = _slow("answer", calls)
+
+        await keyed_service._chat(_SYSTEM, "prompt", 0.7, 100)
+        assert await keyed_service._chat(_SYSTEM, "prompt", 0.7, 100) == "answer"
+        assert len(calls) == 1
+
+    @pytest.mark.parametrize("changed", [
+        (_SYSTEM, "other prompt", 0.7, 100),
+        (_SYSTEM, "prompt", 0.3, 100),
+        (_SYSTEM, "prompt", 0.7, 200),
+    ], ids=["prompt", "temperature", "max-tokens"])
+    @pytest.mark.asyncio
+    async def test_different_requests_are_not_merged(self, keyed_service, changed):
+        """Test any change to the request gets its own completion"""
+        calls = []
+        keyed_service._complete = _slow("answer", calls)
+
+        await asyncio.gather(keyed_service._chat(_SYSTEM, "prompt", 0.7, 100), keyed_service._chat(*changed))
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_late_caller_waits_behind_woken_waiter(self, keyed_service):
+        """Test a caller arriving as the first attempt fails shares the retry with the queued waiter"""
+        calls = []
+        late = []
+
+        async def complete(system_prompt, prompt, temperature, max_tokens):
+            calls.append(prompt)
+            await asyncio.sleep(0.01)
+            if len(calls) == 1:
+                late.append(asyncio.ensure_future(keyed_service._chat(_SYSTEM, "prompt", 0.7, 100)))
+                raise Exception("API Error")
+            return "answer"
+
+        keyed_service._complete = complete
+        first, waiter = await asyncio.gather(
+            keyed_service._chat(_SYSTEM, "prompt", 0.7, 100),
+            keyed_service._chat(_SYSTEM, "prompt", 0.7, 100),
+            return_exceptions=True
+        )
+        assert isinstance(first, Exception)
+        assert waiter == "answer"
+        assert await late[0] == "answer"
+        assert len(calls) == 2
+        assert keyed_service._locks == {}
+
+    @pytest.mark.asyncio
+    async def test_failure_is_not_cached(self, keyed_service):
+        """Test a failed completion is retried on the next call"""
+        keyed_service._complete = AsyncMock(side_effect=[Exception("API Error"), "answer"])
+
+        with pytest.raises(Exception, match="API Error"):
+            await keyed_service._chat(_SYSTEM, "prompt", 0.7, 100)
+        assert await keyed_service._chat(_SYSTEM, "prompt", 0.7, 100) == "answer"
+        assert keyed_service._complete.await_count == 2
+
+
+class TestBatching:
+    """Test coalescing of concurrent completions into batched requests"""
+
+    @pytest.fixture(autouse=True)
+    def _batching_enabled(self, monkeypatch):
+        monkeypatch.setattr(openai_service_module, "OPENAI_BATCH_WINDOW_MS", 20)
+        monkeypatch.setattr(openai_service_module, "OPENAI_BATCH_MAX_TOKENS", 4096)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_batch(self, keyed_service):
+        """Test requests inside the window go out as one completion and are split back apart"""
+        calls = []
+        keyed_service._create = _slow('{"answer": 1}\n---\n{"answer": 2}', calls)
+
+        results = await asyncio.gather(
+            keyed_service._complete(_SYSTEM, "first", 0.7, 100),
+            keyed_service._complete(_SYSTEM, "second", 0.3, 200)
+        )
+        assert results == ['{"answer": 1}', '{"answer": 2}']
+        assert len(calls) == 1
+        _, prompt, temperature, max_tokens = calls[0]
+        assert "### Task 1" in prompt and "### Task 2" in prompt
+        assert temperature == 0.3
+        assert max_tokens == 300
+
+    @pytest.mark.asyncio
+    async def test_single_request_is_sent_as_is(self, keyed_service):
+        """Test a lone request in the window skips the batch prompt"""
+        calls = []
+        keyed_service._create = _slow("answer", calls)
+
+        assert await keyed_service._complete(_SYSTEM, "only", 0.7, 100) == "answer"
+        assert calls == [(_SYSTEM, "only", 0.7, 100)]
+
+    @pytest.mark.asyncio
+    async def test_token_budget_splits_batches(self, keyed_service, monkeypatch):
+        """Test a request that would overflow the token budget opens the next batch"""
+        monkeypatch.setattr(openai_service_module, "OPENAI_BATCH_MAX_TOKENS", 150)
+        calls = []
+        keyed_service._create = _slow(lambda prompt: prompt, calls)
+
+        results = await asyncio.gather(
+            keyed_service._complete(_SYSTEM, "first", 0.7, 100),
+            keyed_service._complete(_SYSTEM, "second", 0.7, 100)
+        )
+        assert results == ["first", "second"]
+        assert [call[1] for call in calls] == ["first", "second"]
+
+    @pytest.mark.asyncio
+    async def test_bad_batch_falls_back_to_individual_requests(self, keyed_service):
+        """Test a batched answer with the wrong number of parts is retried one by one"""
+        calls = []
+        # The batched call gets a single part back; individual calls echo their prompt
+        keyed_service._create = _slow(lambda prompt: "only one answer" if "### Task" in prompt else prompt, calls)
+
+        results = await asyncio.gather(
+            keyed_service._complete(_SYSTEM, "first", 0.7, 100),
+            keyed_service._complete(_SYSTEM, "second", 0.7, 100)
+        )
+        assert results == ["first", "second"]
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_single_request_error_propagates(self, keyed_service):
+        """Test a failing unbatched request raises in its caller"""
+        keyed_service._create = AsyncMock(side_effect=Exception("API Error"))
+
+        with pytest.raises(Exception, match="API Error"):
+            await keyed_service._complete(_SYSTEM, "only", 0.7, 100)
+
+    @pytest.mark.asyncio
+    async def test_aclose_waits_for_in_flight_batches(self, keyed_service):
+        """Test aclose lets a batch already being sent finish"""
+        calls = []
+        keyed_service._create = _slow("answer", calls)
+
+        pending = asyncio.ensure_future(keyed_service._complete(_SYSTEM, "only", 0.7, 100))
+        # Let the window close so the batch is handed to a send task
+        while not keyed_service._batch_tasks:
+            await asyncio.sleep(0.005)
+
+        await keyed_service.aclose()
+        assert keyed_service._batch_tasks == set()
+        assert len(calls) == 1
+        assert await pending == "answer"
@@ -0,0 +1,177 @@
+"""
+Tests for the RPM/TPM-budgeted batch processor
+"""
+import asyncio
+
+import httpx
+import pytest
+from openai import APITimeoutError, BadRequestError, InternalServerError, RateLimitError
+
+from app.services import parallel_processor
+from app.services.parallel_processor import process_batch
+
+
+@pytest.fixture
+def clock(fake_clock):
+    """Fake clock driving the processor's refills and sleeps"""
+    return fake_clock(parallel_processor)
+
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(error_class, status_code):
+    return error_class(f"HTTP {status_code}", response=httpx.Response(status_code, request=_REQUEST), body=None)
+
+
+def _rate_limit_error():
+    return _status_error(RateLimitError, 429)
+
+
+def _recording(clock, result, starts):
+    """Coroutine factory that records when it was dispatched"""
+    async def call():
+        starts.append(clock.now)
+        return result
+    return call
+
+
+class TestBudgeting:
+    """Test dispatch stays within the RPM and TPM budgets"""
+
+    @pytest.mark.asyncio
+    async def test_results_in_input_order(self, clock):
+        """Test results line up with the requests regardless of completion order"""
+        async def call(value, delay):
+            for _ in range(delay):
+                await asyncio.sleep(0)
+            return value
+
+        requests = [(lambda v=v, d=d: call(v, d), 1) for v, d in (("a", 3), ("b", 0), ("c", 1))]
+        assert await process_batch(requests, rpm=60, tpm=1000) == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_token_budget_spaces_requests(self, clock):
+        """Test a request waits until enough tokens have refilled"""
+        starts = []
+        requests = [(_recording(clock, i, starts), 60) for i in range(3)]
+
+        # 100 tokens per minute: the first request leaves 40, and each refill of 60 tokens takes 36s
+        results = await process_batch(requests, rpm=100, tpm=100)
+        assert results == [0, 1, 2]
+        assert starts[0] == pytest.approx(0.0, abs=0.1)
+        assert starts[1] == pytest.approx(12.0, abs=0.1)
+        assert starts[2] - starts[1] == pytest.approx(36.0, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_request_budget_spaces_requests(self, clock):
+        """Test dispatch pauses once the request budget is spent"""
+        starts = []
+        requests = [(_recording(clock, i, starts), 1) for i in range(3)]
+
+        # 2 requests per minute: two go at once, the third after 30s of refill
+        await process_batch(requests, rpm=2, tpm=1000)
+        assert starts[:2] == [pytest.approx(0.0, abs=0.1)] * 2
+        assert starts[2] == pytest.approx(30.0, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_oversized_request_still_runs(self, clock):
+        """Test a request costing more than the whole token budget goes out once the bucket is full"""
+        starts = []
+        results = await process_batch([(_recording(clock, "big", starts), 500)], rpm=60, tpm=100)
+        assert results == ["big"]
+
+
+class TestRetries:
+    """Test 429 backoff, transient-error retries and the retry limit"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_backs_off_and_retries(self, clock):
+        """Test a 429 pauses dispatch before the retry succeeds"""
+        starts = []
+
+        async def call():
+            starts.append(clock.now)
+            if len(starts) == 1:
+                raise _rate_limit_error()
+            return "ok"
+
+        results = await process_batch([(call, 1)], rpm=60, tpm=1000)
+        assert results == ["ok"]
+        # First retry waits 2**1 seconds
+        assert starts[1] - starts[0] >= 2.0
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_halves_request_rate(self, clock):
+        """Test a 429 halves the request rate for the rest of the batch"""
+        starts = []
+        failed = []
+
+        async def flaky():
+            if not failed:
+                failed.append(True)
+                raise _rate_limit_error()
+            starts.append(clock.now)
+            return "retried"
+
+        requests = [(flaky, 1)] + [(_recording(clock, i, starts), 1) for i in range(3)]
+        # 4 requests per minute, so all four go at once; after the 429 the rate
+        # is 2/minute and the retry needs a full 30s of refill
+        results = await process_batch(requests, rpm=4, tpm=1000)
+        assert results == ["retried", 0, 1, 2]
+        assert max(starts) == pytest.approx(30.0, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self, clock):
+        """Test a request failing every attempt holds its last exception"""
+        calls = []
+
+        async def call():
+            calls.append(clock.now)
+            raise APITimeoutError(request=_REQUEST)
+
+        results = await process_batch([(call, 1)], rpm=60, tpm=1000, max_attempts=3)
+        assert len(calls) == 3
+        assert isinstance(results[0], APITimeoutError)
+        # Backoff doubles between attempts
+        assert calls[1] - calls[0] >= 2.0
+        assert calls[2] - calls[1] >= 4.0
+
+    @pytest.mark.parametrize("error", [
+        _status_error(BadRequestError, 400),
+        ValueError("bug in the factory"),
+    ], ids=["bad-request", "factory-bug"])
+    @pytest.mark.asyncio
+    async def test_non_retryable_error_fails_immediately(self, clock, error):
+        """Test a permanent error is returned after one attempt without pausing the batch"""
+        starts = []
+        calls = []
+
+        async def failing():
+            calls.append(clock.now)
+            raise error
+
+        requests = [(failing, 1)] + [(_recording(clock, i, starts), 1) for i in range(2)]
+        results = await process_batch(requests, rpm=60, tpm=1000)
+        assert results[0] is error
+        assert results[1:] == [0, 1]
+        assert len(calls) == 1
+        assert max(starts) == pytest.approx(0.0, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_server_error_is_retried(self, clock):
+        """Test a 5xx is retried after backing off while the rest of the batch runs"""
+        starts = []
+        calls = []
+
+        async def flaky():
+            calls.append(len(starts))
+            if len(calls) == 1:
+                raise _status_error(InternalServerError, 500)
+            return "retried"
+
+        requests = [(flaky, 1)] + [(_recording(clock, i, starts), 1) for i in range(2)]
+        results = await process_batch(requests, rpm=60, tpm=1000)
+        assert results == ["retried", 0, 1]
+        # The other requests went out while the failed one was backing off
+        assert calls == [0, 2]
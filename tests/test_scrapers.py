@@ -0,0 +1,83 @@
+"""
+Tests for the scrapers' request rate limiters
+"""
+import pytest
+
+from app.scrapers import flight_scraper as flight_scraper_module
+from app.scrapers import route_scraper as route_scraper_module
+from app.scrapers.flight_scraper import _HostRateLimiter
+from app.scrapers.route_scraper import RateLimiter
+
+# These tests exercise the limiters themselves, so keep them unstubbed
+pytestmark = pytest.mark.real_rate_limits
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    """Fake clock driving the scrapers' limiters, with no jitter so spacing is exact"""
+    monkeypatch.setattr(flight_scraper_module.random, "uniform", lambda a, b: 0.0)
+    return fake_clock(flight_scraper_module, route_scraper_module)
+
+
+class TestHostRateLimiter:
+    """Test per-host request spacing"""
+
+    def test_first_request_is_immediate(self, clock):
+        """Test a host's first request does not wait"""
+        limiter = _HostRateLimiter(2.0)
+        limiter.wait("https://example.com/a")
+        assert clock.sleeps == []
+
+    def test_same_host_is_spaced(self, clock):
+        """Test back-to-back requests to one host wait out the interval"""
+        limiter = _HostRateLimiter(2.0)
+        limiter.wait("https://example.com/a")
+        limiter.wait("https://example.com/b")
+        limiter.wait("https://example.com/c")
+        assert clock.sleeps == [2.0, 2.0]
+
+    def test_hosts_are_independent(self, clock):
+        """Test requests to different hosts don't wait on each other"""
+        limiter = _HostRateLimiter(2.0)
+        limiter.wait("https://example.com/a")
+        limiter.wait("https://example.org/a")
+        assert clock.sleeps == []
+
+    def test_elapsed_time_counts(self, clock):
+        """Test time already passed is subtracted from the wait"""
+        limiter = _HostRateLimiter(2.0)
+        limiter.wait("https://example.com/a")
+        clock.now += 1.5
+        limiter.wait("https://example.com/b")
+        assert clock.sleeps == [pytest.approx(0.5)]
+
+
+class TestRateLimiter:
+    """Test the async token bucket"""
+
+    @pytest.mark.asyncio
+    async def test_capacity_is_available_immediately(self, clock):
+        """Test a full bucket hands out its capacity without waiting"""
+        limiter = RateLimiter(requests_per_second=2.0, capacity=3.0)
+        for _ in range(3):
+            await limiter.acquire()
+        assert clock.sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_empty_bucket_waits_for_refill(self, clock):
+        """Test an empty bucket waits one token's worth of refill"""
+        limiter = RateLimiter(requests_per_second=2.0)
+        await limiter.acquire()
+        await limiter.acquire()
+        assert clock.sleeps == [pytest.approx(0.5)]
+        assert limiter.tokens == pytest.approx(0.0)
+
+    @pytest.mark.asyncio
+    async def test_refill_is_capped(self, clock):
+        """Test a long idle period does not bank more than the capacity"""
+        limiter = RateLimiter(requests_per_second=2.0, capacity=1.0)
+        await limiter.acquire()
+        clock.now += 60
+        await limiter.acquire()
+        await limiter.acquire()
+        assert clock.sleeps == [pytest.approx(0.5)]
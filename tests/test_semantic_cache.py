@@ -0,0 +1,95 @@
+"""
+Tests for the embedding-similarity cache
+"""
+import pytest
+
+from app.services.semantic_cache import SemanticCache
+
+# Unit-ish vectors: "near" is ~0.995 similar to "base", "far" is orthogonal
+_EMBEDDINGS = {
+    "base": [1.0, 0.0, 0.0],
+    "near": [1.0, 0.1, 0.0],
+    "far": [0.0, 1.0, 0.0],
+    "other": [0.0, 0.0, 2.0],
+}
+
+
+class _Embedder:
+    """Embedding stand-in that counts calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, text):
+        self.calls.append(text)
+        return _EMBEDDINGS[text]
+
+
+@pytest.fixture
+def embed():
+    return _Embedder()
+
+
+class TestSemanticCache:
+    """Test lookups, thresholds and eviction"""
+
+    @pytest.mark.asyncio
+    async def test_empty_cache_misses(self, embed):
+        """Test a lookup on an empty cache returns None"""
+        cache = SemanticCache(embed, threshold=0.97)
+        assert await cache.lookup("base") is None
+
+    @pytest.mark.asyncio
+    async def test_similar_summary_hits(self, embed):
+        """Test a summary above the similarity threshold reuses the stored value"""
+        cache = SemanticCache(embed, threshold=0.97)
+        await cache.store("base", "cached answer")
+        assert await cache.lookup("near") == "cached answer"
+
+    @pytest.mark.asyncio
+    async def test_dissimilar_summary_misses(self, embed):
+        """Test a summary below the threshold is a miss"""
+        cache = SemanticCache(embed, threshold=0.97)
+        await cache.store("base", "cached answer")
+        assert await cache.lookup("far") is None
+
+    @pytest.mark.asyncio
+    async def test_threshold_is_respected(self, embed):
+        """Test a stricter threshold turns a near match into a miss"""
+        cache = SemanticCache(embed, threshold=0.999)
+        await cache.store("base", "cached answer")
+        assert await cache.lookup("near") is None
+
+    @pytest.mark.asyncio
+    async def test_best_match_wins(self, embed):
+        """Test the most similar entry is returned when several pass the threshold"""
+        cache = SemanticCache(embed, threshold=0.9)
+        await cache.store("near", "near answer")
+        await cache.store("base", "base answer")
+        assert await cache.lookup("base") == "base answer"
+
+    @pytest.mark.asyncio
+    async def test_vectors_are_normalized(self, embed):
+        """Test similarity ignores embedding magnitude"""
+        cache = SemanticCache(embed, threshold=0.97)
+        await cache.store("other", "other answer")
+        assert await cache.lookup("other") == "other answer"
+
+    @pytest.mark.asyncio
+    async def test_miss_then_store_embeds_once(self, embed):
+        """Test storing after a miss reuses the lookup's embedding"""
+        cache = SemanticCache(embed, threshold=0.97)
+        assert await cache.lookup("base") is None
+        await cache.store("base", "cached answer")
+        assert embed.calls == ["base"]
+
+    @pytest.mark.asyncio
+    async def test_oldest_entry_is_evicted(self, embed):
+        """Test the ring buffer overwrites the oldest entry once full"""
+        cache = SemanticCache(embed, threshold=0.97, maxsize=2)
+        await cache.store("base", "base answer")
+        await cache.store("far", "far answer")
+        await cache.store("other", "other answer")
+        assert await cache.lookup("base") is None
+        assert await cache.lookup("far") == "far answer"
+        assert await cache.lookup("other") == "other answer"